@@ -1,6 +1,92 @@
+from __future__ import annotations
+
 from math import *
+from typing import Callable, Dict
+
+import numpy as np
 
 class Activation:
 
-    def sigmoid(self, input):
-        return 1/(1+exp(-input * 4.924273)) # 4.924273 is slope
+    # Variable annotations
+    name: str
+    index: int
+    scalar: Callable
+    array: Callable
+
+    # Every activation function by name, in the order they were registered
+    registry: Dict[str, Activation] = {}
+
+    # Activation functions, filled in below
+    sigmoid: Activation
+    tanh: Activation
+    relu: Activation
+    gaussian: Activation
+    sin: Activation
+    identity: Activation
+    clamped: Activation
+
+    # Register a function from its scalar and array implementations, the array one takes an optional out array
+    def __init__(self,
+    name: str = None,
+    scalar: Callable = None,
+    array: Callable = None) -> None:
+
+        if (name is not None and
+        scalar is not None and
+        array is not None):
+
+            self.name = name
+            self.scalar = scalar
+            self.array = array
+
+            self.index = len(Activation.registry)
+            Activation.registry[name] = self
+
+
+    # Activate a single input
+    def __call__(self, input: float) -> float:
+        return self.scalar(input)
+
+
+    def __repr__(self) -> str:
+        return f'Activation({self.name})'
+
+
+    # Functions are shared, copying a node keeps the same function
+    def __copy__(self) -> Activation:
+        return self
+
+    def __deepcopy__(self, memo: Dict) -> Activation:
+        return self
+
+
+
+def _sigmoid(input):
+    return 1/(1+exp(-input * 4.924273)) # 4.924273 is slope
+
+def _sigmoidArray(input, out=None):
+    with np.errstate(over='ignore'):
+        if out is None:
+            return 1/(1+np.exp(-input * 4.924273))
+
+        np.multiply(input, -4.924273, out=out)
+        np.exp(out, out=out)
+        np.add(out, 1, out=out)
+        return np.reciprocal(out, out=out)
+
+def _gaussian(input):
+    return exp(-input * input)
+
+def _gaussianArray(input, out=None):
+    out = np.multiply(input, input, out=out)
+    np.negative(out, out=out)
+    return np.exp(out, out=out)
+
+
+Activation.sigmoid = Activation(name='sigmoid', scalar=_sigmoid, array=_sigmoidArray)
+Activation.tanh = Activation(name='tanh', scalar=tanh, array=np.tanh)
+Activation.relu = Activation(name='relu', scalar=lambda input: max(input, 0), array=lambda input, out=None: np.maximum(input, 0, out=out))
+Activation.gaussian = Activation(name='gaussian', scalar=_gaussian, array=_gaussianArray)
+Activation.sin = Activation(name='sin', scalar=sin, array=np.sin)
+Activation.identity = Activation(name='identity', scalar=lambda input: input, array=np.positive)
+Activation.clamped = Activation(name='clamped', scalar=lambda input: min(max(input, -1), 1), array=lambda input, out=None: np.clip(input, -1, 1, out=out))
@@ -1,4 +1,70 @@
+from __future__ import annotations
+
+from math import prod
+from typing import Callable, Dict, List
+
+import numpy as np
+
 class Aggregation:
 
-    def sum(self, input):
-        return sum(input)
+    # Variable annotations
+    name: str
+    index: int
+    scalar: Callable
+    array: Callable
+
+    # Every aggregation function by name, in the order they were registered
+    registry: Dict[str, Aggregation] = {}
+
+    # Aggregation functions, filled in below
+    sum: Aggregation
+    product: Aggregation
+    max: Aggregation
+    mean: Aggregation
+
+    # Register a function from its scalar and array implementations
+    # The array one reduces each segment of columns starting at the given offsets, into an optional out array
+    def __init__(self,
+    name: str = None,
+    scalar: Callable = None,
+    array: Callable = None) -> None:
+
+        if (name is not None and
+        scalar is not None and
+        array is not None):
+
+            self.name = name
+            self.scalar = scalar
+            self.array = array
+
+            self.index = len(Aggregation.registry)
+            Aggregation.registry[name] = self
+
+
+    # Aggregate a list of inputs
+    def __call__(self, input: List[float]) -> float:
+        return self.scalar(input)
+
+
+    def __repr__(self) -> str:
+        return f'Aggregation({self.name})'
+
+
+    # Functions are shared, copying a node keeps the same function
+    def __copy__(self) -> Aggregation:
+        return self
+
+    def __deepcopy__(self, memo: Dict) -> Aggregation:
+        return self
+
+
+
+def _meanArray(input, segments, out=None):
+    out = np.add.reduceat(input, segments, axis=1, out=out)
+    return np.divide(out, np.diff(segments, append=input.shape[1]), out=out)
+
+
+Aggregation.sum = Aggregation(name='sum', scalar=sum, array=lambda input, segments, out=None: np.add.reduceat(input, segments, axis=1, out=out))
+Aggregation.product = Aggregation(name='product', scalar=prod, array=lambda input, segments, out=None: np.multiply.reduceat(input, segments, axis=1, out=out))
+Aggregation.max = Aggregation(name='max', scalar=max, array=lambda input, segments, out=None: np.maximum.reduceat(input, segments, axis=1, out=out))
+Aggregation.mean = Aggregation(name='mean', scalar=lambda input: sum(input) / len(input), array=_meanArray)
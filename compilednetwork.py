@@ -0,0 +1,721 @@
+from __future__ import annotations
+
+from copy import copy
+from typing import List, Union
+
+import numpy as np
+
+from activation import *
+from aggregation import *
+from networkgraph import *
+from nodeplace import *
+from nodetype import *
+import neat
+
+class CompiledNetwork:
+
+    # Variable annotations
+    nodeCount: int = 0
+    linkCount: int = 0
+    rowCount: int = 1
+
+    # Several networks can be packed side by side, each one is a block of nodes
+    blockCount: int = 1
+    blockAcyclic: np.ndarray
+    nodeBlock: np.ndarray
+    outputBlocks: np.ndarray
+    outputStarts: np.ndarray
+
+    # Node layout, in the same order as Network.nodes
+    sensor: np.ndarray
+    inputs: np.ndarray
+    inputPositions: np.ndarray
+    outputs: np.ndarray
+
+    # Activation and aggregation function of every node, as their index in the registries
+    nodeActivation: np.ndarray
+    nodeAggregation: np.ndarray
+
+    # Link layout, sorted by level, aggregation function and target node so each target owns a contiguous segment
+    linkSource: np.ndarray
+    linkTarget: np.ndarray
+    weight: np.ndarray
+    targets: np.ndarray
+    segments: np.ndarray
+
+    # Targets sharing an aggregation function are reduced together, nodes sharing an activation function are activated together
+    runs: List[tuple]
+    groups: List[tuple]
+    uniformActivation: bool = True
+    uniformAggregation: bool = True
+
+    # Time delayed links read the activation of their source from the previous time step
+    delayed: np.ndarray
+    delayedLinks: np.ndarray
+    delayedSource: np.ndarray
+
+    # Hebbian adaptation, the rates are taken from the link traits once when the net is compiled
+    adaptable: bool = False
+    blockAdaptable: np.ndarray
+    adaptive: np.ndarray
+    rates: np.ndarray
+    linkRecurrent: np.ndarray
+    maxWeight: np.ndarray
+    adaptiveLinks: np.ndarray
+    adaptiveBlock: np.ndarray
+
+    # Nodes of acyclic blocks get their level in the topological order, -1 for the nodes the sweep leaves alone
+    level: np.ndarray
+    levels: List[tuple]
+
+    # Node state, one row per pattern, the float state lives in one block so a flush is a single fill
+    state: np.ndarray = None
+    output: np.ndarray
+    lastActivation: np.ndarray
+    lastActivation2: np.ndarray
+    activationCount: np.ndarray
+    activeFlag: np.ndarray
+
+    # Scratch buffers reused by every activation step
+    activity: np.ndarray
+    aggregate: np.ndarray
+    netInput: np.ndarray
+    activation: np.ndarray
+    mask: np.ndarray
+    previous: np.ndarray
+    previousCount: np.ndarray
+    stale: np.ndarray
+
+    # Active flag propagation
+    neurons: List[int]
+    fedBySensor: np.ndarray
+    flagSources: List[List[int]]
+    reachable: np.ndarray
+    settled: bool = False
+
+    # Sources of every incoming link of every node, and the depth of every node once computed
+    incoming: List[List[int]]
+    depths: List[int] = None
+
+    # Compiled from a genome, the topology it was compiled from and the link of every enabled gene
+    topology: tuple = None
+    geneLinks: np.ndarray = None
+
+
+    def __init__(self,
+    network: Network = None,
+    genome: Genome = None,
+    networks: List[CompiledNetwork] = None) -> None:
+
+        # Compile a network phenotype into flat arrays
+        if (network is not None):
+
+            index = {id(node): i for i, node in enumerate(network.nodes)}
+
+            # Links grouped by target, keeping the incoming order of each node
+            links = []
+            for i, node in enumerate(network.nodes):
+                for link in node.incoming:
+                    # Only links of traits 2, 3 and 4 into neurons adapt
+                    adaptive = network.adaptable and node.type is not NodeType.SENSOR and link.adaptive()
+                    links.append((index[id(link.inode)], i, link.weight, link.timeDelay, adaptive, (link.params + [0, 0, 0])[0:3], link.recurrent))
+
+            self.build(network.nodes,
+            [index[id(node)] for node in network.inputs],
+            [index[id(node)] for node in network.outputs],
+            links, network.adaptable, network.maxWeight,
+            [index[id(node)] for node in network.order] if network.acyclic else None)
+
+            # Start from the current state of the phenotype
+            self.output[0] = [node.output for node in network.nodes]
+            self.lastActivation[0] = [node.lastActivation for node in network.nodes]
+            self.lastActivation2[0] = [node.lastActivation2 for node in network.nodes]
+            self.activationCount[0] = [node.activationCount for node in network.nodes]
+            self.activeFlag[0] = [node.activeFlag and not node.type is NodeType.SENSOR for node in network.nodes]
+            self.settled = bool((self.activeFlag == self.reachable).all())
+
+        # Compile straight from a genome, giving the same arrays as compiling a fresh phenotype of it
+        elif (genome is not None):
+
+            index = {id(node): i for i, node in enumerate(genome.nodes)}
+
+            # The links of the enabled genes, grouped by target and keeping the order of the genes
+            incoming = [[] for _ in genome.nodes]
+            for number, gene in enumerate(gene for gene in genome.genes if gene.enable):
+                incoming[index[id(gene.link.onode)]].append((number, gene))
+
+            sensor = [node.type is NodeType.SENSOR for node in genome.nodes]
+            adaptable = neat.adaptableNetworks
+
+            links = []
+            genes = []
+            for i, genesIn in enumerate(incoming):
+                for number, gene in genesIn:
+                    params = gene.link.trait.params if gene.link.trait is not None else [0] * neat.numberOfTraitParameters
+                    adaptive = adaptable and not sensor[i] and gene.link.adaptive()
+                    links.append((index[id(gene.link.inode)], i, gene.link.weight, gene.link.delayed(), adaptive, (params + [0, 0, 0])[0:3], gene.link.recurrent))
+                    genes.append(number)
+
+            sources = [[index[id(gene.link.inode)] for number, gene in genesIn] for genesIn in incoming]
+
+            # A time delay makes the net recurrent, the same as in Network.topologicalOrder
+            delayed = any(link[3] and not sensor[link[1]] for link in links)
+
+            order = self.build(genome.nodes,
+            [i for i, node in enumerate(genome.nodes) if node.place is NodePlace.INPUT or node.place is NodePlace.BIAS],
+            [i for i, node in enumerate(genome.nodes) if node.place is NodePlace.OUTPUT],
+            links, adaptable, max((abs(link[2]) for link in links), default=0),
+            None if delayed else topologicalSort(sensor, sources))
+
+            # Where the link of every enabled gene ended up after the layout
+            self.geneLinks = np.zeros(self.linkCount, dtype=np.intp)
+            self.geneLinks[np.array(genes, dtype=np.intp)[order]] = np.arange(self.linkCount)
+            self.topology = genome.topologyKey()
+
+        # Pack several compiled networks into one block diagonal system, each network keeps its own block of nodes
+        elif (networks is not None):
+
+            offsets = np.cumsum([0] + [compiled.nodeCount for compiled in networks]).tolist()
+
+            self.nodeCount = offsets[-1]
+            self.linkCount = sum(compiled.linkCount for compiled in networks)
+            self.blockCount = len(networks)
+            self.nodeBlock = np.repeat(np.arange(self.blockCount), [compiled.nodeCount for compiled in networks])
+
+            self.sensor = np.concatenate([compiled.sensor for compiled in networks])
+            self.inputPositions = np.concatenate([compiled.inputPositions for compiled in networks])
+            self.inputs = np.concatenate([compiled.inputs + offset for compiled, offset in zip(networks, offsets)])
+            self.outputs = np.concatenate([compiled.outputs + offset for compiled, offset in zip(networks, offsets)])
+
+            self.nodeActivation = np.concatenate([compiled.nodeActivation for compiled in networks])
+            self.nodeAggregation = np.concatenate([compiled.nodeAggregation for compiled in networks])
+
+            self.linkSource = np.concatenate([compiled.linkSource + offset for compiled, offset in zip(networks, offsets)])
+            self.linkTarget = np.concatenate([compiled.linkTarget + offset for compiled, offset in zip(networks, offsets)])
+            self.weight = np.concatenate([compiled.weight[0] for compiled in networks]).reshape(1, self.linkCount)
+            self.delayed = np.concatenate([compiled.delayed for compiled in networks])
+
+            self.adaptable = any(compiled.adaptable for compiled in networks)
+            self.blockAdaptable = np.concatenate([compiled.blockAdaptable for compiled in networks])
+            self.adaptive = np.concatenate([compiled.adaptive for compiled in networks])
+            self.rates = np.concatenate([compiled.rates for compiled in networks], axis=1)
+            self.linkRecurrent = np.concatenate([compiled.linkRecurrent for compiled in networks])
+            self.maxWeight = np.concatenate([compiled.maxWeight for compiled in networks])
+
+            self.neurons = [i + offset for compiled, offset in zip(networks, offsets) for i in compiled.neurons]
+            self.fedBySensor = np.concatenate([compiled.fedBySensor for compiled in networks])
+            self.flagSources = [None if sources is None else [j + offset for j in sources] for compiled, offset in zip(networks, offsets) for sources in compiled.flagSources]
+            self.reachable = np.concatenate([compiled.reachable for compiled in networks])
+
+            self.blockAcyclic = np.concatenate([compiled.blockAcyclic for compiled in networks])
+            self.level = np.concatenate([compiled.level for compiled in networks])
+
+            self.layout()
+            self.allocate(1)
+
+            self.output[0] = np.concatenate([compiled.output[0] for compiled in networks])
+            self.lastActivation[0] = np.concatenate([compiled.lastActivation[0] for compiled in networks])
+            self.lastActivation2[0] = np.concatenate([compiled.lastActivation2[0] for compiled in networks])
+            self.activationCount[0] = np.concatenate([compiled.activationCount[0] for compiled in networks])
+            self.activeFlag[0] = np.concatenate([compiled.activeFlag[0] for compiled in networks])
+            self.settled = bool((self.activeFlag == self.reachable).all())
+
+
+    # Lay out the nodes and links of a single network, the links given as tuples of
+    # source, target, weight, time delay, adaptive, hebbian rates and recurrent, grouped by target
+    # The topological order of the neurons is None for a recurrent net, returns the order the links were sorted in
+    def build(self, nodes: List[Node], inputs: List[int], outputs: List[int], links: List[tuple], adaptable: bool, maxWeight: float, topological: List[int]) -> np.ndarray:
+
+        self.nodeCount = len(nodes)
+        sensor = [node.type is NodeType.SENSOR for node in nodes]
+        self.sensor = np.array(sensor, dtype=bool)
+
+        # Only SENSOR inputs take a value, but they keep their position in the input list
+        self.inputPositions = np.array([position for position, i in enumerate(inputs) if sensor[i]], dtype=np.intp)
+        self.inputs = np.array([i for i in inputs if sensor[i]], dtype=np.intp)
+        self.outputs = np.array(outputs, dtype=np.intp)
+
+        self.blockCount = 1
+        self.nodeBlock = np.zeros(self.nodeCount, dtype=np.intp)
+
+        self.nodeActivation = np.array([node.activation.index for node in nodes], dtype=np.intp)
+        self.nodeAggregation = np.array([node.aggregation.index for node in nodes], dtype=np.intp)
+
+        self.linkCount = len(links)
+        self.linkSource = np.array([link[0] for link in links], dtype=np.intp)
+        self.linkTarget = np.array([link[1] for link in links], dtype=np.intp)
+        self.weight = np.array([link[2] for link in links], dtype=float).reshape(1, self.linkCount)
+        self.delayed = np.array([link[3] for link in links], dtype=bool)
+
+        self.adaptable = adaptable
+        self.blockAdaptable = np.array([adaptable])
+        self.adaptive = np.array([link[4] for link in links], dtype=bool)
+        self.rates = np.array([link[5] for link in links], dtype=float).reshape(self.linkCount, 3).T
+        self.linkRecurrent = np.array([link[6] for link in links], dtype=bool)
+        self.maxWeight = np.full(self.linkCount, maxWeight, dtype=float)
+
+        # Every incoming link for the depth, and the ones without a time delay for the active flags
+        self.incoming = [[] for _ in nodes]
+        incoming = [[] for _ in nodes]
+        for link in links:
+            self.incoming[link[1]].append(link[0])
+            if not link[3]:
+                incoming[link[1]].append(link[0])
+
+        # A node becomes active once one of its inputs is a sensor or an active node
+        self.neurons = [i for i in range(self.nodeCount) if not sensor[i]]
+        self.fedBySensor = np.zeros(self.nodeCount, dtype=bool)
+        self.flagSources = [None] * self.nodeCount
+        outgoing = [[] for _ in nodes]
+        for i in self.neurons:
+            self.fedBySensor[i] = any(sensor[j] for j in incoming[i])
+            # A self loop is read right after the flag is cleared, so it never counts
+            self.flagSources[i] = sorted(set(j for j in incoming[i] if not sensor[j] and j != i))
+            for j in self.flagSources[i]:
+                outgoing[j].append(i)
+
+        reachable = self.fedBySensor.tolist()
+        frontier = [i for i in range(self.nodeCount) if reachable[i]]
+        while frontier:
+            for i in outgoing[frontier.pop()]:
+                if not reachable[i]:
+                    reachable[i] = True
+                    frontier.append(i)
+        self.reachable = np.array(reachable, dtype=bool)
+
+        # Acyclic nets are activated one level after the other, following the topological order
+        self.blockAcyclic = np.array([topological is not None])
+        level = [-1] * self.nodeCount
+        if topological is not None:
+            level = [0] * self.nodeCount
+            for i in topological:
+                level[i] = max((level[j] + 1 for j in incoming[i]), default=0)
+
+            # Nodes that never become active are left alone
+            level = [l if r else -1 for l, r in zip(level, reachable)]
+        self.level = np.array(level, dtype=np.intp)
+
+        order = self.layout()
+        self.allocate(1)
+        self.settled = bool((self.activeFlag == self.reachable).all())
+
+        return order
+
+
+    # Copy the compiled net to patch its weights, the layout is shared and the state starts flushed
+    def copy(self) -> CompiledNetwork:
+
+        compiled = copy(self)
+        compiled.weight = self.weight[:1].copy()
+        compiled.rates = self.rates.copy()
+        compiled.maxWeight = self.maxWeight.copy()
+
+        compiled.state = None
+        compiled.allocate(1)
+        compiled.settled = bool((compiled.activeFlag == compiled.reachable).all())
+
+        return compiled
+
+
+    # Write the weights and rates of the enabled genes into their links, the genome must have the topology this was compiled from
+    def patch(self, genome: Genome) -> CompiledNetwork:
+
+        genes = [gene for gene in genome.genes if gene.enable]
+
+        weight = np.array([gene.link.weight for gene in genes], dtype=float)
+        self.weight[:, self.geneLinks] = weight
+        self.maxWeight.fill(np.abs(weight).max(initial=0))
+
+        for gene, link in zip(genes, self.geneLinks.tolist()):
+            params = gene.link.trait.params if gene.link.trait is not None else [0] * neat.numberOfTraitParameters
+            self.rates[:, link] = (params + [0, 0, 0])[0:3]
+
+        return self
+
+
+    # The longest path from a sensor to an output, the same as Network.maxDepth
+    def maxDepth(self) -> int:
+        if self.depths is None:
+            self.depths = self.computeDepths()
+        return max(self.depths[i] for i in self.outputs.tolist())
+
+
+    # Longest path to every node, links that close a cycle are not followed
+    def computeDepths(self) -> List[int]:
+        return longestPaths(self.sensor.tolist(), self.incoming)
+
+
+    # Work out the link segments, the levels of the sweep and which blocks own which outputs
+    # Returns the order the links were sorted in
+    def layout(self) -> np.ndarray:
+
+        # Sort the links by level, aggregation function then by target, keeping the incoming order of each node
+        order = np.lexsort((self.linkTarget, self.nodeAggregation[self.linkTarget], self.level[self.linkTarget]))
+        self.linkSource = self.linkSource[order]
+        self.linkTarget = self.linkTarget[order]
+        self.weight = self.weight[:, order]
+        self.delayed = self.delayed[order]
+        self.adaptive = self.adaptive[order]
+        self.rates = self.rates[:, order]
+        self.linkRecurrent = self.linkRecurrent[order]
+        self.maxWeight = self.maxWeight[order]
+
+        self.adaptiveLinks = np.flatnonzero(self.adaptive)
+        self.adaptiveBlock = self.nodeBlock[self.linkTarget[self.adaptiveLinks]]
+
+        self.delayedLinks = np.flatnonzero(self.delayed)
+        self.delayedSource = self.linkSource[self.delayedLinks]
+
+        self.segments = np.flatnonzero(np.diff(self.linkTarget, prepend=-1))
+        self.targets = self.linkTarget[self.segments]
+
+        self.uniformActivation = self.nodeActivation.min(initial=0) == self.nodeActivation.max(initial=0)
+        self.uniformAggregation = self.nodeAggregation.min(initial=0) == self.nodeAggregation.max(initial=0)
+
+        self.runs = self.aggregationRuns(0, self.linkCount)
+        self.groups = self.activationGroups(np.arange(self.nodeCount))
+
+        # Every level of the sweep is a contiguous run of links
+        self.levels = []
+        linkLevel = self.level[self.linkTarget]
+        for level in range(1, self.level.max(initial=0) + 1):
+            start, end = np.searchsorted(linkLevel, [level, level + 1])
+            targets = self.linkTarget[self.segments[(self.segments >= start) & (self.segments < end)]]
+            self.levels.append((start, end, targets, self.aggregationRuns(start, end), self.activationGroups(targets)))
+
+        self.outputBlocks, self.outputStarts = np.unique(self.nodeBlock[self.outputs], return_index=True)
+
+        return order
+
+
+    # Split the links from start to end into runs of targets sharing an aggregation function
+    # Each run gives its function, its links and segments relative to start, and the columns of its targets
+    def aggregationRuns(self, start: int, end: int) -> List[tuple]:
+
+        aggregations = list(Aggregation.registry.values())
+
+        first, last = np.searchsorted(self.segments, [start, end])
+        segments = self.segments[first:last]
+
+        # Usually every node sums its inputs
+        if self.uniformAggregation:
+            return [(aggregations[self.nodeAggregation[0]], 0, end - start, segments - start, 0, len(segments))] if len(segments) else []
+
+        kinds = self.nodeAggregation[self.linkTarget[segments]]
+
+        runs = []
+        bounds = np.flatnonzero(np.diff(kinds, prepend=-1)).tolist() + [len(segments)]
+        for a, b in zip(bounds, bounds[1:]):
+            linkStart = segments[a]
+            linkEnd = segments[b] if b < len(segments) else end
+            runs.append((aggregations[kinds[a]], linkStart - start, linkEnd - start, segments[a:b] - linkStart, a, b))
+
+        return runs
+
+
+    # Group the given nodes by activation function, giving each function and the positions of its nodes
+    def activationGroups(self, nodes: np.ndarray) -> List[tuple]:
+
+        activations = list(Activation.registry.values())
+
+        # Usually every node is a sigmoid
+        if self.uniformActivation:
+            return [(activations[self.nodeActivation[0]], slice(None))] if len(nodes) else []
+
+        kinds = self.nodeActivation[nodes]
+        return [(activations[kind], np.flatnonzero(kinds == kind)) for kind in np.unique(kinds)]
+
+
+    # Aggregate every run of link activity into the columns of its targets
+    def applyAggregations(self, runs: List[tuple], activity: np.ndarray, out: np.ndarray) -> None:
+        for aggregation, linkStart, linkEnd, segments, first, last in runs:
+            aggregation.array(activity[:, linkStart:linkEnd], segments, out=out[:, first:last])
+
+
+    # Run every group of columns through its activation function, into out
+    def applyActivations(self, groups: List[tuple], input: np.ndarray, out: np.ndarray) -> None:
+
+        # Everything shares one function, so it can be written in place
+        if len(groups) == 1:
+            groups[0][0].array(input, out=out)
+
+        else:
+            for activation, positions in groups:
+                out[:, positions] = activation.array(input[:, positions])
+
+
+    # Allocate flushed state and scratch buffers for the given number of rows, reusing them if the rows did not change
+    def allocate(self, rows: int) -> None:
+
+        # Every row adapts its own copy of the weights
+        if self.adaptable and len(self.weight) != rows:
+            self.weight = np.repeat(self.weight[:1], rows, axis=0)
+
+        if self.state is not None and rows == self.rowCount:
+            self.flush()
+            self.activeFlag.fill(False)
+            return
+
+        self.rowCount = rows
+
+        self.state = np.zeros((3, rows, self.nodeCount))
+        self.output, self.lastActivation, self.lastActivation2 = self.state
+        self.activationCount = np.zeros((rows, self.nodeCount), dtype=np.int64)
+        self.activeFlag = np.zeros((rows, self.nodeCount), dtype=bool)
+
+        self.activity = np.zeros((rows, self.linkCount))
+        self.aggregate = np.zeros((rows, len(self.targets)))
+        self.netInput = np.zeros((rows, self.nodeCount))
+        self.activation = np.zeros((rows, self.nodeCount))
+        self.mask = np.zeros((rows, self.nodeCount), dtype=bool)
+
+        self.previous = np.zeros((rows, len(self.delayedLinks)))
+        self.previousCount = np.zeros((rows, len(self.delayedLinks)), dtype=np.int64)
+        self.stale = np.zeros((rows, len(self.delayedLinks)), dtype=bool)
+
+
+    # Puts the network back into an inactive state
+    def flush(self) -> None:
+        self.state.fill(0)
+        self.activationCount.fill(0)
+
+
+    # Back to a single flushed row with no active node, as if just compiled from a fresh phenotype
+    def reset(self) -> None:
+        self.allocate(1)
+        self.settled = bool((self.activeFlag == self.reachable).all())
+
+
+    # Loads sensor values, every block gets the same values
+    def loadSensors(self, values: List[float]) -> None:
+        values = np.asarray(values, dtype=float)
+        used = self.inputPositions < values.shape[-1]
+        inputs = self.inputs[used]
+
+        self.activationCount[:, inputs] += 1
+        self.lastActivation2[:, inputs] = self.lastActivation[:, inputs]
+        self.lastActivation[:, inputs] = self.output[:, inputs]
+        self.output[:, inputs] = values[..., self.inputPositions[used]]
+
+
+    # Returns the outputs' activations, one row per pattern
+    def getOutputs(self) -> np.ndarray:
+        return self.output[:, self.outputs]
+
+
+    # For each row and block, return true if not all outputs are active
+    def outputsOff(self) -> np.ndarray:
+        off = np.zeros((self.rowCount, self.blockCount), dtype=bool)
+        if len(self.outputs):
+            off[:, self.outputBlocks] = np.logical_or.reduceat(self.activationCount[:, self.outputs] == 0, self.outputStarts, axis=1)
+        return off
+
+
+    # Recompute the active flags the way Network.activate does, one node after the other, only where gated if given
+    def propagateFlags(self, gate: np.ndarray = None) -> None:
+
+        # Once every reachable node is active the flags can no longer change
+        if self.settled:
+            return
+
+        previous = self.activeFlag.copy()
+
+        for i in self.neurons:
+            if self.fedBySensor[i]:
+                self.activeFlag[:, i] = True
+            else:
+                self.activeFlag[:, i] = self.activeFlag[:, self.flagSources[i]].any(axis=1)
+
+        # Nodes that are not activated keep their flags
+        if gate is not None:
+            np.copyto(self.activeFlag, previous, where=~gate)
+
+        self.settled = bool((self.activeFlag == self.reachable).all())
+
+
+    # Activates the net such that all outputs are active, only in the running blocks if given
+    def activate(self, running: np.ndarray = None) -> bool:
+
+        gate = self.outputsOff()
+        if running is not None:
+            gate &= running
+
+        # Keep activating until all the outputs have become active
+        if gate.any():
+
+            # Spread the gate of each block over its nodes
+            gate = gate[:, self.nodeBlock]
+
+            self.propagateFlags(gate)
+            self.gather()
+
+            # Only activate the nodes which are active in the blocks still running
+            np.logical_and(self.activeFlag, gate, out=self.mask)
+            self.update()
+
+        # Adaptation happens on every call, in the blocks still running
+        self.adapt(running)
+
+        return True
+
+
+    # Advances the net by one time step whether or not its outputs are already active
+    def step(self) -> bool:
+
+        self.propagateFlags()
+        self.gather()
+
+        np.copyto(self.mask, self.activeFlag)
+        self.update()
+        self.adapt()
+
+        return True
+
+
+    # Steps the net once per row of sensor values, keeping its state between steps, and returns the outputs of every step
+    # Each row of the sequence can also hold one set of values per pattern row
+    def run(self, sequence: List[List[float]]) -> np.ndarray:
+
+        sequence = np.asarray(sequence, dtype=float)
+        outputs = np.zeros((len(sequence), self.rowCount, len(self.outputs)))
+
+        for values, output in zip(sequence, outputs):
+            self.loadSensors(values)
+            self.step()
+            np.take(self.output, self.outputs, axis=1, out=output)
+
+        return outputs
+
+
+    # Gather the activity coming in over every link and sum it per target into the net inputs
+    def gather(self) -> None:
+
+        if not self.linkCount:
+            return
+
+        np.take(self.output, self.linkSource, axis=1, out=self.activity, mode='clip')
+        np.maximum(self.activity, 0, out=self.activity)
+
+        # Time delayed links see the previous activation, or nothing if the source has not been activated twice yet
+        if len(self.delayedLinks):
+            np.take(self.lastActivation, self.delayedSource, axis=1, out=self.previous, mode='clip')
+            np.take(self.activationCount, self.delayedSource, axis=1, out=self.previousCount, mode='clip')
+            np.less_equal(self.previousCount, 1, out=self.stale)
+            np.copyto(self.previous, 0, where=self.stale)
+            self.activity[:, self.delayedLinks] = self.previous
+
+        np.multiply(self.activity, self.weight, out=self.activity)
+        self.applyAggregations(self.runs, self.activity, self.aggregate)
+        self.netInput[:, self.targets] = self.aggregate
+
+
+    # ADAPTATION:  Adapt the weights of adaptive links based on activations, only in the running blocks if given
+    def adapt(self, running: np.ndarray = None) -> None:
+
+        if not len(self.adaptiveLinks):
+            return
+
+        links = self.adaptiveLinks
+        source = self.linkSource[links]
+        target = self.linkTarget[links]
+
+        # In the recurrent case we must take the last activation of the input for calculating hebbian changes
+        activeIn = np.maximum(self.output[:, source], 0)
+        np.copyto(activeIn, self.lastActivation[:, source], where=self.linkRecurrent[links])
+        activeOut = np.maximum(self.output[:, target], 0)
+
+        weight = neat.hebbianArray(self.weight[:, links], self.maxWeight[links], activeIn, activeOut, self.rates[:, links])
+
+        if running is not None:
+            weight = np.where(running[..., self.adaptiveBlock], weight, self.weight[:, links])
+
+        self.weight[:, links] = weight
+
+
+    # Activate the masked nodes off their net inputs
+    def update(self) -> None:
+
+        # Keep a memory of activations for potential time delayed connections
+        np.copyto(self.lastActivation2, self.lastActivation, where=self.mask)
+        np.copyto(self.lastActivation, self.output, where=self.mask)
+
+        self.applyActivations(self.groups, self.netInput, self.activation)
+        np.copyto(self.output, self.activation, where=self.mask)
+        self.activationCount += self.mask
+
+
+    # Activates the acyclic blocks in a single sweep along their topological order
+    def sweep(self) -> None:
+
+        for start, end, targets, runs, groups in self.levels:
+
+            # Everything feeding this level is already final
+            activity = np.take(self.output, self.linkSource[start:end], axis=1)
+            np.maximum(activity, 0, out=activity)
+            np.multiply(activity, self.weight[:, start:end], out=activity)
+
+            netInput = np.empty((self.rowCount, len(targets)))
+            self.applyAggregations(runs, activity, netInput)
+            self.applyActivations(groups, netInput, netInput)
+
+            self.lastActivation2[:, targets] = self.lastActivation[:, targets]
+            self.lastActivation[:, targets] = self.output[:, targets]
+
+            self.output[:, targets] = netInput
+            self.activationCount[:, targets] += 1
+
+        # The sweep counts as a single activation
+        self.adapt(self.blockAcyclic)
+
+
+    # Activates each input pattern on its own row, from a flushed net, and returns the outputs per pattern
+    # Acyclic blocks are swept once, the others are activated steps times, either for every block or one count per block
+    def activateBatch(self, inputs: List[List[float]], steps: Union[int, List[int]]) -> np.ndarray:
+
+        inputs = np.asarray(inputs, dtype=float).reshape(len(inputs), -1)
+        outputs = np.zeros((len(inputs), len(self.outputs)))
+
+        steps = np.where(self.blockAcyclic, 0, steps)
+        stepCount = int(steps.max(initial=0))
+
+        # The sweep leaves every reachable node of an acyclic block active
+        flags = self.activeFlag[0].copy()
+        acyclic = self.blockAcyclic[self.nodeBlock]
+        flags[acyclic] = self.reachable[acyclic]
+        self.activeFlag[0] = flags
+        self.settled = bool((flags == self.reachable).all())
+
+        first = 0
+
+        # While the flags are still spreading each pattern sees the flags the one before it left,
+        # and adaptive nets see the weights the pattern before it left
+        while first < len(inputs) and (not self.settled or self.adaptable):
+            self.allocate(1)
+            self.activeFlag[0] = flags
+
+            self.loadSensors(inputs[first])
+            self.sweep()
+            for step in range(stepCount):
+                self.activate(step < steps)
+
+            outputs[first] = self.getOutputs()[0]
+            flags = self.activeFlag[0].copy()
+            first += 1
+
+        # The remaining patterns all start from the same flags, so they run side by side
+        if first < len(inputs):
+            self.allocate(len(inputs) - first)
+            self.activeFlag[:] = flags
+
+            self.loadSensors(inputs[first:])
+            self.sweep()
+            for step in range(stepCount):
+                self.activate(step < steps)
+
+            outputs[first:] = self.getOutputs()
+
+        # Leave a single flushed row behind
+        self.allocate(1)
+        self.activeFlag[0] = flags
+
+        return outputs
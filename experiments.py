@@ -3,6 +3,7 @@ from __future__ import annotations
 from time import sleep
 from typing import Dict, List
 
+import numpy as np
 from yaml import load, Loader
 
 import neat
@@ -103,10 +104,10 @@ def xorEpoch(population: Population, experimentNumber: int, generationNumber: in
     winnerOrganism: Organism
     passed: bool = False
 
-    # Evaluate each organism
-    for organism in population.organisms:
+    # Evaluate every organism at once
+    for organism, winner in zip(population.organisms, xorEvaluatePopulation(population)):
         #print(organism.genome.id)
-        if xorEvaluate(organism):
+        if winner:
             passed = True
             winnerOrganism = organism
             winnerId = organism.genome.id
@@ -146,14 +147,11 @@ def xorEpoch(population: Population, experimentNumber: int, generationNumber: in
 def xorEvaluate(organism: Organism) -> bool:
     network: Network
 
-    outputList: List[float] = []
+    outputList: List[float]
 
     expectedOutputList: List[float] = [0.0, 1.0, 1.0, 0.0]
     successOutputThreshold: List[float] = [0.5, 0.5, 0.5, 0.5]
 
-    # Check for successful activation
-    success: bool
-
     # Used for figuring out how many nodes should be visited
     numberOfNodes: int
 
@@ -170,41 +168,27 @@ def xorEvaluate(organism: Organism) -> bool:
     network = organism.network
 
     numberOfNodes = len(organism.genome.nodes)
-    networkDepth = network.maxDepth()
-
-    # Load and activate the network for each input
-    for input in inputList:
-        network.loadSensors(input)
-
 
-        success = network.activate()
+    # An acyclic network settles in a single sweep, there is no depth to walk
+    networkDepth = 0 if network.acyclic else network.maxDepth()
 
-        for relax in range(networkDepth + 1):
-            success = network.activate()
-            output = network.outputs[0].output
+    # Load and activate the network for every input at once, in a single sweep if it is acyclic
+    # and otherwise relaxing it networkDepth + 1 more times
+    outputList = network.activateBatch(inputList, 0 if network.acyclic else networkDepth + 2)[:, 0].tolist()
 
-        outputList.append(network.outputs[0].output)
+    #vprint(3, f'Organism ID: {organism.genome.id} adaptable {network.adaptable}')
 
-        #vprint(3, f'Organism ID: {organism.genome.id} adaptable {network.adaptable}')
+    organism.outputList = outputList
 
-        network.flush()
+    # The batch always activates the network, an output nothing reaches simply stays at 0
+    errorsum = 0
+    errorsum += abs(expectedOutputList[0] - outputList[0])
+    errorsum += abs(expectedOutputList[1] - outputList[1])
+    errorsum += abs(expectedOutputList[2] - outputList[2])
+    errorsum += abs(expectedOutputList[3] - outputList[3])
 
-    network.outputList = outputList
-
-    if success:
-        errorsum = 0
-        errorsum += abs(expectedOutputList[0] - outputList[0])
-        errorsum += abs(expectedOutputList[1] - outputList[1])
-        errorsum += abs(expectedOutputList[2] - outputList[2])
-        errorsum += abs(expectedOutputList[3] - outputList[3])
-
-        organism.fitness = (4.0 - errorsum) ** 2
-        organism.error = errorsum
-
-    else:
-        # Flawed network
-        errorsum = 999.0
-        organism.fitness = 0.001
+    organism.fitness = (4.0 - errorsum) ** 2
+    organism.error = errorsum
 
     vprint(3, f'Organism: {organism.genome.id}')
     vprint(3, f'Error: {outputList} -> {errorsum}')
@@ -223,3 +207,48 @@ def xorEvaluate(organism: Organism) -> bool:
         organism.winner = False
 
     return organism.winner
+
+
+
+def xorEvaluatePopulation(population: Population) -> List[bool]:
+
+    outputs: np.ndarray
+    errors: np.ndarray
+    winners: np.ndarray
+
+    expectedOutputList: List[float] = [0.0, 1.0, 1.0, 0.0]
+    successOutputThreshold: List[float] = [0.5, 0.5, 0.5, 0.5]
+
+    inputList: List[List[float]] = [
+        [1.0, 0.0, 0.0],
+        [1.0, 0.0, 1.0],
+        [1.0, 1.0, 0.0],
+        [1.0, 1.0, 1.0]
+    ]
+
+    # Activate every network on every input at once, acyclic ones in a single sweep
+    # and the others relaxing their own depth + 1 more times
+    outputs = population.activateBatch(inputList, [0 if organism.compiled.blockAcyclic[0] else organism.compiled.maxDepth() + 2 for organism in population.organisms])[:, :, 0]
+
+    errors = np.abs(np.array(expectedOutputList) - outputs)
+    winners = (errors < np.array(successOutputThreshold)).all(axis=1)
+
+    for organism, outputList, error, winner in zip(population.organisms, outputs.tolist(), errors.tolist(), winners.tolist()):
+        organism.outputList = outputList
+
+        errorsum = 0
+        errorsum += error[0]
+        errorsum += error[1]
+        errorsum += error[2]
+        errorsum += error[3]
+
+        organism.fitness = (4.0 - errorsum) ** 2
+        organism.error = errorsum
+        organism.winner = winner
+
+        vprint(3, f'Organism: {organism.genome.id}')
+        vprint(3, f'Error: {outputList} -> {errorsum}')
+        vprint(3, f'Fitness: {organism.fitness}')
+        vprint(3, f'')
+
+    return winners.tolist()
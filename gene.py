@@ -8,6 +8,9 @@ from trait import *
 
 class Gene:
 
+    # Genomes hold many genes, so they only get room for these attributes
+    __slots__ = ('link', 'innovation', 'mutation', 'enable', 'frozen')
+
     # Variable annotations
     link: Link
     innovation: float
@@ -56,9 +59,8 @@ class Gene:
         mutation is not None):
             raise NotImplementedError
 
-        # Construct a gene off of another gene as a duplicate
+        # Construct a gene off of another gene as a duplicate, the trait may be None
         elif (gene is not None and
-        trait is not None and
         inode is not None and
         onode is not None):
 
@@ -88,7 +90,6 @@ class Gene:
             else:
                 for trait in traits:
                     if trait.id == data['trait']:
-                        self.trait = trait
                         break
 
             for node in nodes:
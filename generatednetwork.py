@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from math import exp, isfinite
+from typing import Callable, Dict, List
+
+from activation import *
+from aggregation import *
+from nodetype import *
+
+class GeneratedNetwork:
+
+    # Variable annotations
+    source: str
+    function: Callable
+
+    # Activations whose outputs are never negative do not need to be clipped when read over a link
+    positive: List[Activation] = [Activation.sigmoid, Activation.relu, Activation.gaussian]
+
+    def __init__(self,
+    network: Network = None) -> None:
+
+        # Generate a straight line function from an acyclic network, every weight becomes a constant
+        if (network is not None):
+
+            if not network.acyclic or network.adaptable:
+                raise ValueError('Only acyclic networks without adaptation can be generated')
+
+            names = {}
+            active = {}
+            namespace = {'exp': exp, 'max': max}
+            lines = ['def activate(inputs):']
+
+            # Sensors take their value straight from the inputs
+            for position, node in enumerate(network.inputs):
+                if node.type is NodeType.SENSOR:
+                    names[id(node)] = f'n{len(names)}'
+                    active[id(node)] = True
+                    lines.append(f'    {names[id(node)]} = inputs[{position}]')
+
+            # Every other node is computed once, following the topological order
+            for node in network.order:
+                name = f'n{len(names)}'
+                names[id(node)] = name
+
+                # A node that nothing active feeds is never activated and stays at 0
+                active[id(node)] = any(link.inode.type is NodeType.SENSOR or active.get(id(link.inode), False) for link in node.incoming)
+                if not active[id(node)]:
+                    lines.append(f'    {name} = 0.0')
+                    continue
+
+                terms = [f'{self.constant(link.weight)} * {self.activeOut(link.inode, names, active)}' for link in node.incoming]
+
+                if node.aggregation is Aggregation.sum:
+                    aggregate = ' + '.join(terms)
+                else:
+                    namespace[f'aggregation{node.aggregation.index}'] = node.aggregation.scalar
+                    aggregate = f'aggregation{node.aggregation.index}([{", ".join(terms)}])'
+
+                if node.activation is Activation.sigmoid:
+                    lines.append(f'    {name} = 1/(1+exp(-({aggregate}) * 4.924273))')
+                else:
+                    namespace[f'activation{node.activation.index}'] = node.activation.scalar
+                    lines.append(f'    {name} = activation{node.activation.index}({aggregate})')
+
+            # Outputs that are never reached keep their flushed value
+            outputs = [names.get(id(node), '0.0') for node in network.outputs]
+            lines.append(f'    return [{", ".join(outputs)}]')
+
+            self.source = '\n'.join(lines) + '\n'
+            exec(compile(self.source, f'<generated network {network.id}>', 'exec'), namespace)
+            self.function = namespace['activate']
+
+
+    # Activates the net on one value per input and returns the activations of the outputs
+    def activate(self, inputs: List[float]) -> List[float]:
+        return self.function(inputs)
+
+
+    # The exact literal of a weight
+    def constant(self, value: float) -> str:
+        return repr(value) if isfinite(value) else f'float({repr(repr(value))})'
+
+
+    # What a link reads from its input node, the same as Node.getActiveOut
+    def activeOut(self, node: Node, names: Dict[int, str], active: Dict[int, bool]) -> str:
+        if id(node) not in names or not active[id(node)]:
+            return '0.0'
+        if node.type is not NodeType.SENSOR and node.activation in self.positive:
+            return names[id(node)]
+        return f'max({names[id(node)]}, 0)'
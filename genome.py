@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from copy import deepcopy
-from random import choice, random, uniform
-from typing import Dict, List
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from random import choice, randint, random, uniform
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
 
 from gene import *
+from generatednetwork import *
 from mutator import *
 from network import *
+from networkgraph import *
 from node import *
 from nodeplace import *
 from population import *
@@ -25,6 +30,15 @@ class Genome:
 
     phenotype: Network = None
 
+    # Straight line function of the phenotype, generated on demand
+    generated: GeneratedNetwork = None
+
+    # Innovation numbers and mutations of the genes for compatibility, dropped whenever the genes change
+    geneArrayCache: Tuple[np.ndarray, np.ndarray, bool] = None
+
+    # Links of the genes and the graph of the enabled feed-forward ones, for adding links
+    linkIndex: Tuple[Set[Tuple[int, int, bool]], NetworkGraph] = None
+
 
     def __init__(self,
     id: int = None,
@@ -115,6 +129,8 @@ class Genome:
             newNode = Node(type=node.type, id=node.id)
 
             newNode.deriveTrait(node.trait)
+            newNode.activation = node.activation
+            newNode.aggregation = node.aggregation
 
             # Check for input or output designation of node
             if node.place is NodePlace.INPUT:
@@ -139,6 +155,7 @@ class Genome:
 
                 # NOTE: This line could be run through a recurrency check if desired
                 newLink = Link(weight=gene.link.weight, inode=inode, onode=onode, recurrent=gene.link.recurrent)
+                newLink.timeDelay = gene.link.delayed()
                 onode.incoming.append(newLink)
                 inode.outcoming.append(newLink)
 
@@ -156,6 +173,10 @@ class Genome:
         self.phenotype = newNet
 
         newNet.maxWeight = maxWeight
+        newNet.adaptable = neat.adaptableNetworks
+
+        # Feed forward nets can be activated in a single sweep
+        newNet.topologyChanged()
 
         return newNet
 
@@ -184,11 +205,45 @@ class Genome:
 
 
     # Duplicate this Genome to create a new one with the specified id
-    def duplicate(self, id: int) -> Genome:
-        #print(f"duplicated with {id}")
-        genome = deepcopy(self)
-        genome.id = id
-        return genome
+    # Traits and nodes are copied once and the genes point at the copies, the phenotype is never copied
+    def duplicate(self, newId: int) -> Genome:
+
+        # Copies of the traits and nodes by the identity of the original
+        traits = {id(None): None}
+        nodes = {}
+
+        newTraits = []
+        for trait in self.traits:
+            traits[id(trait)] = Trait(trait=trait)
+            newTraits.append(traits[id(trait)])
+
+        newNodes = []
+        for node in self.nodes:
+            nodes[id(node)] = Node(node=node, trait=traits[id(node.trait)])
+            newNodes.append(nodes[id(node)])
+
+        newGenes = [Gene(gene=gene, trait=traits[id(gene.link.trait)], inode=nodes[id(gene.link.inode)], onode=nodes[id(gene.link.onode)]) for gene in self.genes]
+
+        return Genome(id=newId, traits=newTraits, nodes=newNodes, genes=newGenes)
+
+
+    # Key of everything but the weights and traits, genomes with the same key compile to the same layout
+    # The genes name their nodes by position, a genome can hold several nodes with the same id
+    def topologyKey(self) -> tuple:
+
+        position = {node: row for row, node in enumerate(self.nodes)}
+
+        nodes = tuple((node.id, node.type.value, node.place.value, node.activation.index, node.aggregation.index) for node in self.nodes)
+        genes = tuple((position[gene.link.inode], position[gene.link.onode], gene.link.recurrent, gene.link.delayed(), neat.adaptableNetworks and gene.link.adaptive()) for gene in self.genes if gene.enable)
+
+        return (nodes, genes, neat.adaptableNetworks)
+
+
+    # Generate a straight line function computing the outputs of the phenotype, kept until the genome changes
+    def generate(self) -> GeneratedNetwork:
+        if self.generated is None:
+            self.generated = GeneratedNetwork(network=self.phenotype if self.phenotype is not None else self.genesis(self.id))
+        return self.generated
 
 
     # Return id of final Node in Genome
@@ -204,6 +259,7 @@ class Genome:
     # Perturb params in one trait
     def mutateRandomTrait(self) -> None:
         choice(self.traits).mutate()
+        self.phenotypeChanged()
 
 
     # Change random link's trait. Repeat count times
@@ -213,6 +269,8 @@ class Genome:
             trait = choice(self.traits)
             gene.link.trait = trait
 
+        self.phenotypeChanged()
+
 
     # Change random node's trait count times
     def mutateNodeTrait(self, count: int) -> None:
@@ -221,29 +279,38 @@ class Genome:
             trait = choice(self.traits)
             node.trait = trait
 
+        self.phenotypeChanged()
+
 
     # Add Gaussian noise to linkweights either GAUSSIAN or UNIFORM (from zero)
+    # Small genomes are mutated gene by gene, packing them into arrays costs more than the loop
     def mutateLinkWeights(self, power: float, rate: float, mutationType: Mutator) -> None:
 
+        if len(self.genes) >= neat.weightMutationBatchMinimum:
+            mutateLinkWeights([self], power, rate, mutationType)
+            return
+
         # Once in a while really shake things up
         severe: bool = False
 
         if random() > 0.5:
             severe = True
 
+        geneCount = len(self.genes)
+
         num = 0
         # Loop on all genes
         for gene in self.genes:
             # Don't mutate weights of frozen links
             if not gene.frozen:
 
-                # For severe ones
+                # For severe ones
                 if severe:
                     gausspoint = 0.3
                     coldgausspoint = 0.2
 
                 # For last genes
-                elif len(self.genes) >= 10 and num > len(self.genes) * 0.8:
+                elif geneCount >= 10 and num > geneCount * 0.8:
                     gausspoint = 0.5
                     coldgausspoint = 0.2
 
@@ -272,15 +339,33 @@ class Genome:
 
                 num += 1
 
+        self.geneArrayCache = None
+        self.phenotypeChanged()
+
 
     # Toggle genes on or off
     def mutateToggleEnable(self, count: int) -> None:
-        raise NotImplementedError
+        for index in range(count):
+            gene = choice(self.genes)
+
+            if gene.enable:
+                # Only disable a gene if another enabled gene leaves the same node, so the node is not cut off
+                if any(other.enable and other.link.inode is gene.link.inode and other.innovation != gene.innovation for other in self.genes):
+                    gene.enable = False
+                    self.genesChanged()
+
+            else:
+                gene.enable = True
+                self.genesChanged()
 
 
     # Find first disabled gene and enable it
     def mutateGeneReenable(self) -> None:
-        raise NotImplementedError
+        for gene in self.genes:
+            if not gene.enable:
+                gene.enable = True
+                self.genesChanged()
+                break
 
 
     # Mutate genome by adding a node respresentation
@@ -307,7 +392,7 @@ class Genome:
             # If we couldn't find anything so say goodbye
             return
 
-        # Disabled the gene
+        # Disabled the gene, the new node keeps every path it made so the link index does not change
         gene.enable = False
 
         # Extract the link
@@ -318,22 +403,17 @@ class Genome:
         trait = link.trait
 
 
-        for innovation in population.innovations:
-            if (innovation.type is InnovationType.NEWNODE and
-            innovation.inode == inode.id and
-            innovation.onode == onode.id and
-            innovation.oldNum == gene.innovation):
+        innovation = population.innovations.findNode(inode.id, onode.id, gene.innovation)
+        if innovation is not None:
             # Here, the innovation has been done before
 
-                # Create the new node
-                newNode = Node(type=NodeType.NEURON, id=innovation.newNode, place=NodePlace.HIDDEN)
-                newNode.trait = self.traits[0]
-
-                # Create the new Genes
-                newGene1 = Gene(trait=trait, weight=1, inode=inode, onode=newNode, recurrent=link.recurrent, innovation=innovation.num1, mutation=0)
-                newGene2 = Gene(trait=trait, weight=1, inode=newNode, onode=onode, recurrent=False, innovation=innovation.num2, mutation=0)
+            # Create the new node
+            newNode = Node(type=NodeType.NEURON, id=innovation.newNode, place=NodePlace.HIDDEN)
+            newNode.trait = self.traits[0]
 
-                break
+            # Create the new Genes
+            newGene1 = Gene(trait=trait, weight=1, inode=inode, onode=newNode, recurrent=link.recurrent, innovation=innovation.num1, mutation=0)
+            newGene2 = Gene(trait=trait, weight=1, inode=newNode, onode=onode, recurrent=False, innovation=innovation.num2, mutation=0)
 
         else:
             # The innovation is totally novel
@@ -368,9 +448,8 @@ class Genome:
     """
     # Mutate the genome by adding a new link between 2 random nodes
     def mutateAddLink(self, population: Population, tries: int) -> None:
-        nodeCount: int # Counter for finding nodes
         node1: Node # Pointers to the nodes
-        node2: Node # Pointers to the nodes
+        node2: Node # Pointers to the nodes
         found: bool = False # Tells whether an open pair was found
 
         isRecurrent: bool # Indicates whether proposed link is recurrent
@@ -380,20 +459,14 @@ class Genome:
 
         newWeight: float # The new weight for the new link
 
-        done: bool
         recurrent: bool = False
         loopRecurrent: bool
         firstNonSensorIndex: int = 0
 
-        # These are used to avoid getting stuck in an infinite loop checking
-    	# for recursion
         # Note that we check for recursion to control the frequency of
     	# adding recurrent links rather than to prevent any paricular
     	# kind of error
 
-        thresh: int = len(self.nodes)**2
-        count: int = 0
-
         # Make attempts to find an unconnected pair
         tryCount = 0
 
@@ -427,29 +500,15 @@ class Genome:
                     node2 = choice(self.nodes[firstNonSensorIndex:])
 
 
-                # See if a recurrent link already exists  ALSO STOP AT END OF GENES!!!!
-                for gene in self.genes:
-
-                    if not (nodep2.type is not NodeType.SENSOR and # Don't allow SENSORS to get input
-                    not gene.link.inode is node1 and
-                    gene.link.onode is node2 and
-                    gene.link.recurrent):
-                        # Didn't make to the end of genes
-
-                        tryCount += 1
-                        break
+                # See if a recurrent link already exists, and don't allow SENSORS to get input
+                if node2.type is NodeType.SENSOR or self.hasLink(node1, node2, True):
+                    tryCount += 1
 
                 else:
-                    # Made to the end of genes
-
-                    count = 0
-                    isRecurrent = self.phenotype.isRecurrent(node1.analogue, node2.analogue, count, thresh)
+                    isRecurrent = self.isRecurrent(node1, node2)
 
                     # ADDED: CONSIDER connections out of outputs recurrent
-                    if (
-                    node1.type == NodeType.OUTPUT or
-                    node2.type == NodeType.OUTPUT
-                    ):
+                    if node1.place is NodePlace.OUTPUT:
                         isRecurrent = True
 
                     # Make sure it finds the right kind of link (recur)
@@ -468,33 +527,19 @@ class Genome:
                 node1 = choice(self.nodes)
                 node2 = choice(self.nodes[firstNonSensorIndex:])
 
-                # See if a recurrent link already exists  ALSO STOP AT END OF GENES!!!!
-                for gene in self.genes:
-
-                    if not (node2.type is not NodeType.SENSOR and # Don't allow SENSORS to get input
-                    not gene.link.inode is node1 and
-                    gene.link.onode is node2 and
-                    gene.link.recurrent):
-                        # Didn't make to the end of genes
-
-                        tryCount += 1
-                        break
+                # See if a nonrecurrent link already exists, and don't allow SENSORS to get input
+                if node2.type is NodeType.SENSOR or self.hasLink(node1, node2, False):
+                    tryCount += 1
 
                 else:
-                    # Made to the end of genes
-
-                    count = 0
-                    isRecurrent = self.phenotype.isRecurrent(node1.analogue, node2.analogue, count, thresh)
+                    isRecurrent = self.isRecurrent(node1, node2)
 
                     # ADDED: CONSIDER connections out of outputs recurrent
-                    if (
-                    node1.type == NodeType.OUTPUT or
-                    node2.type == NodeType.OUTPUT
-                    ):
+                    if node1.place is NodePlace.OUTPUT:
                         isRecurrent = True
 
-                    # Make sure it finds the right kind of link (recur)
-                    if not isRecurrent:
+                    # Make sure it finds the right kind of link (not recur)
+                    if isRecurrent:
                         tryCount += 1
                     else:
                         tryCount = tries
@@ -509,40 +554,31 @@ class Genome:
                 isRecurrent = True
             vprint(3, 'found')
             # loop to find a non recurrent link
-            for innovation in innovations:
-
-                # Match the innovation in the innovs list
-                if (innovation.type is InnovationType.NEWLINK and
-                innovation.inode == node1.id and
-                innovation.onode == node2.id and
-                innovation.recurrent == isRecurrent):
-
-                    # Create the new gene
-                    newGene = Gene(
-                        trait=trait,
-                        weight=newWeight,
-                        inode=node1,
-                        onode=node2,
-                        recurrent=isRecurrent,
-                        innovation=population.currentInnovationNumber,
-                        mutation=newWeight
-                    )
-
-                    break
+            innovation = population.innovations.findLink(node1.id, node2.id, isRecurrent)
+            if innovation is not None:
+                # Here, the innovation has been done before
+
+                # Create the new gene
+                newGene = Gene(
+                    trait=self.traits[innovation.trait],
+                    weight=innovation.weight,
+                    inode=node1,
+                    onode=node2,
+                    recurrent=isRecurrent,
+                    innovation=innovation.num1,
+                    mutation=0
+                )
+
             # The innovation is totally novel
             else:
-                # If the phenotype does not exist, exit
-                if phenotype == 0:
-                    vprint(1, 'Error: Attempt to add link to genome with no phenotype')
-                    return None
-
                 # Choose a random trait
-                trait = choice(self.traits)
+                traitNumber = randint(0, len(self.traits) - 1)
+                trait = self.traits[traitNumber]
 
                 # Choose the new weight
                 newWeight = uniform(-1, 1)
 
-                # Create the new gene
+                # Create the new gene
                 newGene = Gene(
                     trait=trait,
                     weight=newWeight,
@@ -559,13 +595,12 @@ class Genome:
                     onode=node2.id,
                     num1=population.currentInnovationNumber,
                     weight=newWeight,
-                    trait=trait
+                    trait=traitNumber,
+                    recurrent=isRecurrent
                 ))
 
                 population.currentInnovationNumber += 1
 
-
-
             self.addGene(newGene)
 
 
@@ -574,23 +609,76 @@ class Genome:
         raise NotImplementedError
 
 
+    # Return the keys of the links of all Genes and the graph of node ids linked by enabled feed-forward Genes
+    def linkGraph(self) -> Tuple[Set[Tuple[int, int, bool]], NetworkGraph]:
+        if self.linkIndex is None:
+            links = set(gene.link.key() for gene in self.genes)
+            graph = NetworkGraph(
+                nodes=[node.id for node in self.nodes],
+                links=[(gene.link.inode.id, gene.link.onode.id) for gene in self.genes if gene.enable and not gene.link.recurrent])
+
+            self.linkIndex = (links, graph)
+
+        return self.linkIndex
+
+
+    # Tell if a Gene already links inode to onode
+    def hasLink(self, inode: Node, onode: Node, recurrent: bool) -> bool:
+        return (inode.id, onode.id, recurrent) in self.linkGraph()[0]
+
+
+    # Tell if a link from inode to onode would close a loop, that is if inode can already be reached from onode
+    def isRecurrent(self, inode: Node, onode: Node) -> bool:
+        return self.linkGraph()[1].isRecurrent(inode.id, onode.id)
+
+
+    # Forget everything computed from the Genes after they changed
+    def genesChanged(self) -> None:
+        self.geneArrayCache = None
+        self.linkIndex = None
+        self.phenotypeChanged()
+
+
+    # Forget the phenotype and the function generated from it, they were built from the old weights, traits or topology
+    def phenotypeChanged(self) -> None:
+        self.phenotype = None
+        self.generated = None
+
+
     # Adds a new gene that has been created through a mutation
     def addGene(self, gene: Gene) -> None:
-        try:
-            index = next(i for i, g in enumerate(self.genes) if g.innovation >= gene.innovation)
-            self.genes.insert(index, gene)
-        except StopIteration:
-            self.genes.append(gene)
+        index = bisect_left(self.genes, gene.innovation, key=geneKey)
+        self.genes.insert(index, gene)
+        self.geneArrayCache = None
+        self.phenotypeChanged()
+
+        # Keep the link index up to date rather than building it again
+        if self.linkIndex is not None:
+            links, graph = self.linkIndex
+            links.add(gene.link.key())
+            if gene.enable and not gene.link.recurrent:
+                graph.addLink(gene.link.inode.id, gene.link.onode.id)
 
 
     # Inserts a Node into a given ordered list of Nodes in order
     def insertNode(self, nodelist: List[Node], node: Node) -> None:
-        #print(node.id, node.type, node.place)
-        try:
-            index = next(i for i, n in enumerate(nodelist) if n.id >= node.id)
-            nodelist.insert(index, node)
-        except StopIteration:
-            nodelist.append(node)
+        index = bisect_left(nodelist, node.id, key=nodeKey)
+        nodelist.insert(index, node)
+
+
+    # Return the baby's copy of a parent Node, adding it to the baby's Nodes by id if it is not there already
+    def inheritNode(self, node: Node, newTraits: List[Trait], newNodes: Dict[int, Node]) -> Node:
+        newNode = newNodes.get(node.id)
+        if newNode is None:
+            if node.trait is None:
+                nodeTraitNumber = 0
+            else:
+                nodeTraitNumber = node.trait.id - self.traits[0].id
+
+            newNode = Node(node=node, trait=newTraits[nodeTraitNumber])
+            newNodes[node.id] = newNode
+
+        return newNode
 
 
     # This method mates this Genome with another genome.
@@ -609,9 +697,12 @@ class Genome:
 
         # The baby Genome will contain these new Traits, NNodes, and Genes
         newTraits: List[Trait] = []
-        newNodes: List[Node] = []
+        newNodes: Dict[int, Node] = {}
         newGenes: List[Gene] = []
 
+        # The connections of the baby's Genes, to find conflicting ones
+        newLinks: Set[Tuple[int, int, bool]] = set()
+
         # Trait number for a node
         traitNumber: int
 
@@ -642,7 +733,7 @@ class Genome:
 
                 # Create a new node off the sensor or output
                 newONode = Node(node=node, trait=newTraits[traitNumber])
-                self.insertNode(newNodes, newONode)
+                newNodes[newONode.id] = newONode
 
 
         # Now move through the Genes of each parent until both genomes end
@@ -687,9 +778,8 @@ class Genome:
 
 
             # Check to see if the chosengene conflicts with an already chosen gene
-            for chosenGene2 in newGenes:
-                if chosenGene2.link == chosenGene.link:
-                    skip = True
+            if chosenGene.link.key() in newLinks:
+                skip = True
 
             #print(chosenGene.link.inode.id, chosenGene.link.onode.id, "ids", skip, "skip")
 
@@ -707,56 +797,9 @@ class Genome:
 
                 onode = chosenGene.link.onode
 
-                # Check for inode in the newnodes list
-                if inode.id < onode.id:
-
-                    # Checking for inode's existence
-                    for node in newNodes:
-                        if node.id == inode.id:
-                            newINode = node
-                            break
-                    else:
-                        # Here we know the node doesn't exist so we have to add it
-                        if inode.trait is None:
-                            nodeTraitNumber = 0
-                        else:
-                            nodeTraitNumber = inode.trait.id - self.traits[0].id
-
-                        newINode = Node(node=inode, trait=newTraits[nodeTraitNumber])
-                        self.insertNode(newNodes, newINode)
-
-                # Checking for onode's existence
-                for node in newNodes:
-                    if node.id == onode.id:
-                        newONode = node
-                        break
-                else:
-                    # Here we know the node doesn't exist so we have to add it
-                    if inode.trait is None:
-                        nodeTraitNumber = 0
-                    else:
-                        nodeTraitNumber = onode.trait.id - self.traits[0].id
-
-                    newONode = Node(node=onode, trait=newTraits[nodeTraitNumber])
-                    self.insertNode(newNodes, newONode)
-
-                # If the onode has a higher id than the inode we want to add it first
-                if onode.id < inode.id:
-
-                    # Checking for inode's existence
-                    for node in newNodes:
-                        if node.id == inode.id:
-                            newINode = node
-                            break
-                    else:
-                        # Here we know the node doesn't exist so we have to add it
-                        if inode.trait is None:
-                            nodeTraitNumber = 0
-                        else:
-                            nodeTraitNumber = inode.trait.id - self.traits[0].id
-
-                        newINode = Node(node=inode, trait=newTraits[nodeTraitNumber])
-                        self.insertNode(newNodes, newINode)
+                # The baby's Nodes are kept by id and only sorted once it is complete
+                newINode = self.inheritNode(inode, newTraits, newNodes)
+                newONode = self.inheritNode(onode, newTraits, newNodes)
 
 
                 # Add the Gene
@@ -767,8 +810,9 @@ class Genome:
                     disable = False
 
                 newGenes.append(newGene)
+                newLinks.add(newGene.link.key())
 
-        newGenome = Genome(id=genomeId, traits=newTraits, nodes=newNodes, genes=newGenes)
+        newGenome = Genome(id=genomeId, traits=newTraits, nodes=sortNodes(newNodes.values()), genes=newGenes)
 
 
         #print("mate end")
@@ -794,9 +838,12 @@ class Genome:
 
         # The baby Genome will contain these new Traits, NNodes, and Genes
         newTraits: List[Trait] = []
-        newNodes: List[Node] = []
+        newNodes: Dict[int, Node] = {}
         newGenes: List[Gene] = []
 
+        # The connections of the baby's Genes, to find conflicting ones
+        newLinks: Set[Tuple[int, int, bool]] = set()
+
         # Trait number for a node
         traitNumber: int
 
@@ -823,7 +870,7 @@ class Genome:
 
                 # Create a new node off the sensor or output
                 newONode = Node(node=node, trait=newTraits[traitNumber])
-                self.insertNode(newNodes, newONode)
+                newNodes[newONode.id] = newONode
 
 
         # Now move through the Genes of each parent until both genomes end
@@ -884,10 +931,9 @@ class Genome:
 
 
             # Check to see if the chosengene conflicts with an already chosen gene
-            for chosenGene2 in newGenes:
-                if chosenGene2.link == chosenGene.link:
-                    skip = True
-                    
+            if chosenGene.link.key() in newLinks:
+                skip = True
+
             # Now add the chosengene to the baby
             if not skip:
 
@@ -901,64 +947,18 @@ class Genome:
                 inode = chosenGene.link.inode
                 onode = chosenGene.link.onode
 
-                # Check for inode in the newnodes list
-                if inode.id < onode.id:
-
-                    # Checking for inode's existence
-                    for node in newNodes:
-                        if node.id == inode.id:
-                            newINode = node
-                            break
-                    else:
-                        # Here we know the node doesn't exist so we have to add it
-                        if inode.trait is None:
-                            nodeTraitNumber = 0
-                        else:
-                            nodeTraitNumber = inode.trait.id - self.traits[0].id
-
-                        newINode = Node(node=inode, trait=newTraits[nodeTraitNumber])
-                        self.insertNode(newNodes, newINode)
-
-                # Checking for onode's existence
-                for node in newNodes:
-                    if node.id == onode.id:
-                        newONode = node
-                        break
-                else:
-                    # Here we know the node doesn't exist so we have to add it
-                    if inode.trait is None:
-                        nodeTraitNumber = 0
-                    else:
-                        nodeTraitNumber = onode.trait.id - self.traits[0].id
-
-                    newONode = Node(node=onode, trait=newTraits[nodeTraitNumber])
-                    self.insertNode(newNodes, newONode)
-
-                # If the onode has a higher id than the inode we want to add it first
-                if onode.id < inode.id:
-
-                    # Checking for inode's existence
-                    for node in newNodes:
-                        if node.id == inode.id:
-                            newINode = node
-                            break
-                    else:
-                        # Here we know the node doesn't exist so we have to add it
-                        if inode.trait is None:
-                            nodeTraitNumber = 0
-                        else:
-                            nodeTraitNumber = inode.trait.id - self.traits[0].id
-
-                        newINode = Node(node=inode, trait=newTraits[nodeTraitNumber])
-                        self.insertNode(newNodes, newINode)
+                # The baby's Nodes are kept by id and only sorted once it is complete
+                newINode = self.inheritNode(inode, newTraits, newNodes)
+                newONode = self.inheritNode(onode, newTraits, newNodes)
 
 
                 # Add the Gene
                 newGene = Gene(gene=chosenGene, trait=newTraits[traitNumber], inode=newINode, onode=newONode)
 
                 newGenes.append(newGene)
+                newLinks.add(newGene.link.key())
 
-        newGenome = Genome(id=genomeId, traits=newTraits, nodes=newNodes, genes=newGenes)
+        newGenome = Genome(id=genomeId, traits=newTraits, nodes=sortNodes(newNodes.values()), genes=newGenes)
         return newGenome
 
 
@@ -967,9 +967,141 @@ class Genome:
         raise NotImplementedError
 
 
+    # Return the innovation numbers and mutations of the Genes as arrays, and whether the innovations strictly increase
+    def geneArrays(self) -> Tuple[np.ndarray, np.ndarray, bool]:
+        if self.geneArrayCache is None:
+            innovation = np.array([gene.innovation for gene in self.genes], dtype=float)
+            mutation = np.array([gene.mutation for gene in self.genes], dtype=float)
+            ordered = bool(np.all(innovation[1:] > innovation[:-1]))
+            self.geneArrayCache = (innovation, mutation, ordered)
+
+        return self.geneArrayCache
+
+
     # This function gives a measure of compatibility between two Genomes
     def compatibility(self, genome: Genome) -> float:
 
+        # Small genomes are quicker to walk than to hand over to numpy
+        if len(self.genes) + len(genome.genes) < 120:
+            return self.compatibilityMerge(genome)
+
+        innovation1, mutation1, ordered1 = self.geneArrays()
+        innovation2, mutation2, ordered2 = genome.geneArrays()
+
+        # Repeated or unsorted innovations need the gene by gene walk to count the same way
+        if not (ordered1 and ordered2):
+            return self.compatibilityMerge(genome)
+
+        count1 = len(innovation1)
+        count2 = len(innovation2)
+
+        shared, index1, index2 = np.intersect1d(innovation1, innovation2, assume_unique=True, return_indices=True)
+        matching = len(shared)
+
+        # Genes past the end of the other genome are excess, the rest that do not match are disjoint
+        if count1 == 0 or count2 == 0:
+            excess = count1 + count2
+        elif innovation1[-1] < innovation2[-1]:
+            excess = count2 - int(np.searchsorted(innovation2, innovation1[-1], side='right'))
+        else:
+            excess = count1 - int(np.searchsorted(innovation1, innovation2[-1], side='right'))
+        disjoint = count1 + count2 - 2 * matching - excess
+
+        # A running sum adds the differences one after the other in innovation order, as the walk does
+        mutationDifference = 0
+        if matching > 0:
+            mutationDifference = float(np.cumsum(np.abs(mutation1[index1] - mutation2[index2]))[-1])
+
+        return (neat.disjointCoefficient * disjoint +
+        neat.excessCoefficient * excess +
+        neat.mutationDifferenceCoefficient * mutationDifference / matching)
+
+
+    # Tell if the compatibility with genome is below threshold, giving up as soon as a lower bound reaches it
+    # Genomes without any matching gene are never compatible
+    def compatible(self, genome: Genome, threshold: float) -> bool:
+
+        disjointCoefficient = neat.disjointCoefficient
+        excessCoefficient = neat.excessCoefficient
+        mutationDifferenceCoefficient = neat.mutationDifferenceCoefficient
+
+        genes1 = self.genes
+        genes2 = genome.genes
+        count1 = len(genes1)
+        count2 = len(genes2)
+
+        if count1 == 0 or count2 == 0:
+            return False
+
+        # The bounds only hold when no term of the distance can be negative
+        if (disjointCoefficient < 0 or excessCoefficient < 0 or mutationDifferenceCoefficient < 0 or
+        not (self.geneArrays()[2] and genome.geneArrays()[2])):
+            try:
+                return self.compatibility(genome) < threshold
+            except ZeroDivisionError:
+                return False
+
+        # Genes past the last innovation of the other genome are excess
+        if genes1[-1].innovation < genes2[-1].innovation:
+            end1 = count1
+            end2 = bisect_right(genes2, genes1[-1].innovation, key=geneKey)
+        else:
+            end1 = bisect_right(genes1, genes2[-1].innovation, key=geneKey)
+            end2 = count2
+        excess = count1 - end1 + count2 - end2
+
+        # The genes left over on one side can only be disjoint
+        if excessCoefficient * excess + disjointCoefficient * abs(end1 - end2) >= threshold:
+            return False
+
+        if count1 + count2 >= 120:
+            try:
+                return self.compatibility(genome) < threshold
+            except ZeroDivisionError:
+                return False
+
+        matching = 0
+        disjoint = 0
+        mutationDifference = 0
+
+        i1 = 0
+        i2 = 0
+        while i1 < end1 and i2 < end2:
+            gene1 = genes1[i1]
+            gene2 = genes2[i2]
+
+            if gene1.innovation == gene2.innovation:
+                matching += 1
+                mutationDifference += abs(gene1.mutation - gene2.mutation)
+                i1 += 1
+                i2 += 1
+                continue
+
+            elif gene1.innovation > gene2.innovation:
+                i2 += 1
+
+            else:
+                i1 += 1
+
+            disjoint += 1
+            if (disjointCoefficient * (disjoint + abs(end1 - i1 - end2 + i2)) +
+            excessCoefficient * excess >= threshold):
+                return False
+
+        # Whatever is left before the excess genes is disjoint
+        disjoint += end1 - i1 + end2 - i2
+
+        if matching == 0:
+            return False
+
+        return (disjointCoefficient * disjoint +
+        excessCoefficient * excess +
+        mutationDifferenceCoefficient * mutationDifference / matching) < threshold
+
+
+    # Compatibility walking through the genes of both Genomes one at a time
+    def compatibilityMerge(self, genome: Genome) -> float:
+
         maxSize = max(len(self.genes), len(genome.genes))
         excess = 0
         matching = 0
@@ -1031,6 +1163,8 @@ class Genome:
             trait = choice(self.traits)
             gene.link.trait = trait
 
+        self.phenotypeChanged()
+
 
     def print(self):
         genomeDict = self.toDict()
@@ -1045,3 +1179,120 @@ class Genome:
         vprint(1, f'Genome traits: {_traitprint}')
         vprint(1, f'Genome nodes: {_nodeprint}')
         vprint(1, f'Genome genes: {_geneprint}')
+
+
+
+# Add Gaussian noise to the linkweights of every genome in a single batch
+def mutateLinkWeights(genomes: List[Genome], power: float, rate: float, mutationType: Mutator) -> None:
+
+    genes = [gene for genome in genomes for gene in genome.genes]
+
+    weight = np.array([gene.link.weight for gene in genes], dtype=float)
+    frozen = np.array([gene.frozen for gene in genes], dtype=bool)
+
+    weight = neat.mutateWeightsArray(weight, frozen, [len(genome.genes) for genome in genomes], power, rate, mutationType)
+
+    # Don't touch the frozen links
+    for gene, newWeight, isFrozen in zip(genes, weight.tolist(), frozen.tolist()):
+        if not isFrozen:
+            gene.link.weight = newWeight
+            gene.mutation = newWeight
+
+    for genome in genomes:
+        genome.geneArrayCache = None
+        genome.phenotypeChanged()
+
+
+# Compatibility of every genome with every representative, the genomes in rows
+# Only the representatives are laid out over their innovations, the genomes keep their own genes and are compared
+# chunkSize at a time, so no temporary grows past representatives x chunkSize
+# Pairs without matching genes, where compatibility raises ZeroDivisionError, are infinitely far apart
+def compatibilityMatrix(genomes: List[Genome], representatives: List[Genome], chunkSize: int = 1024) -> np.ndarray:
+
+    distances = np.empty((len(genomes), len(representatives)))
+    if len(genomes) == 0 or len(representatives) == 0:
+        return distances
+
+    arrays = [genome.geneArrays() for genome in genomes]
+    representativeArrays = [genome.geneArrays() for genome in representatives]
+
+    # Every innovation of the representatives gets a column, plus an empty one for the genes none of them has
+    innovations = np.unique(np.concatenate([innovation for innovation, _, _ in representativeArrays]))
+    present2 = np.zeros((len(representatives), len(innovations) + 1), dtype=bool)
+    mutation2 = np.zeros((len(representatives), len(innovations) + 1))
+
+    for row, (innovation, geneMutation, ordered) in enumerate(representativeArrays):
+        if ordered:
+            columns = np.searchsorted(innovations, innovation)
+            present2[row, columns] = True
+            mutation2[row, columns] = geneMutation
+
+    count2 = np.array([len(innovation) for innovation, _, _ in representativeArrays])
+    last2 = np.array([innovation[-1] if len(innovation) > 0 else -np.inf for innovation, _, _ in representativeArrays])
+
+    for start in range(0, len(genomes), chunkSize):
+        chunk = arrays[start:start + chunkSize]
+
+        count1 = np.array([len(innovation) for innovation, _, _ in chunk])
+        last1 = np.array([innovation[-1] if len(innovation) > 0 else -np.inf for innovation, _, _ in chunk])
+
+        # The genes of the chunk side by side, padded with genes that match nothing
+        innovation1 = np.full((len(chunk), count1.max(initial=0)), np.inf)
+        mutation1 = np.zeros(innovation1.shape)
+        for row, (innovation, geneMutation, ordered) in enumerate(chunk):
+            innovation1[row, :len(innovation)] = innovation
+            mutation1[row, :len(innovation)] = geneMutation
+
+        columns = np.minimum(np.searchsorted(innovations, innovation1), len(innovations))
+        known = columns < len(innovations)
+        known[known] = innovations[columns[known]] == innovation1[known]
+        columns[~known] = len(innovations)
+
+        # Walk the genes in innovation order, so the differences add up one after the other as in Genome.compatibility
+        matching = np.zeros((len(representatives), len(chunk)), dtype=np.intp)
+        within1 = np.zeros((len(representatives), len(chunk)), dtype=np.intp)
+        mutationDifference = np.zeros((len(representatives), len(chunk)))
+
+        for position in range(innovation1.shape[1]):
+            column = columns[:, position]
+            matched = present2[:, column]
+
+            matching += matched
+            mutationDifference += np.where(matched, np.abs(mutation1[:, position] - mutation2[:, column]), 0.0)
+            within1 += innovation1[:, position] <= last2[:, None]
+
+        # Genes past the last gene of the other genome are excess, the rest that do not match are disjoint
+        beyond1 = count1[None, :] - within1
+        beyond2 = np.array([count - np.searchsorted(innovation, last1, side='right') for count, (innovation, _, _) in zip(count2, representativeArrays)])
+        excess = np.where(last1[None, :] < last2[:, None], beyond2, beyond1)
+        excess = np.where((count1[None, :] == 0) | (count2[:, None] == 0), count1[None, :] + count2[:, None], excess)
+        disjoint = count1[None, :] + count2[:, None] - 2 * matching - excess
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block = (neat.disjointCoefficient * disjoint +
+            neat.excessCoefficient * excess +
+            neat.mutationDifferenceCoefficient * mutationDifference / matching)
+        block[matching == 0] = np.inf
+
+        distances[start:start + chunkSize] = block.T
+
+    # Genomes with repeated or unsorted innovations are compared one pair at a time
+    for row, (_, _, ordered1) in enumerate(arrays):
+        for column, (_, _, ordered2) in enumerate(representativeArrays):
+            if not (ordered1 and ordered2):
+                try:
+                    distances[row, column] = genomes[row].compatibility(representatives[column])
+                except ZeroDivisionError:
+                    distances[row, column] = np.inf
+
+    return distances
+
+
+# Sort keys of the Genes and Nodes of a Genome
+geneKey = attrgetter('innovation')
+nodeKey = attrgetter('id')
+
+
+# Build an ordered list of Nodes out of unordered ones at once
+def sortNodes(nodes: Iterable[Node]) -> List[Node]:
+    return sorted(nodes, key=nodeKey)
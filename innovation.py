@@ -8,6 +8,9 @@ class InnovationType(Enum):
 
 class Innovation:
 
+    # Innovations are kept for the whole run, so they only get room for these attributes
+    __slots__ = ('type', 'inode', 'onode', 'num1', 'num2', 'newWeight', 'newTrait', 'newNode', 'oldNum', 'weight', 'trait', 'recurrent')
+
     # Variable annotations
     type: InnovationType
 
@@ -23,6 +26,10 @@ class Innovation:
 
     oldNum: float
 
+    # The weight and trait of a new link
+    weight: float
+    trait: int
+
     recurrent: bool
 
 
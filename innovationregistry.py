@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Tuple
+
+import neat
+from innovation import *
+
+class InnovationRegistry:
+
+    # Variable annotations
+    history: int = None
+    nodes: Dict[Tuple[int, int, float], Innovation]
+    links: Dict[Tuple[int, int, bool], Innovation]
+    generations: Deque[List[Innovation]]
+
+    hits: int = 0
+    misses: int = 0
+
+    # Keep the innovations of the last history generations, or neat.innovationHistory of them if not given
+    # A history of 0 forgets them every generation like the original NEAT, a negative one keeps them forever
+    def __init__(self,
+    history: int = None) -> None:
+
+        self.history = history
+        self.nodes = {}
+        self.links = {}
+        self.generations = deque([[]])
+
+
+    # Return the new node innovation that split the gene oldNum between inode and onode, if it is known
+    def findNode(self, inode: int, onode: int, oldNum: float) -> Innovation:
+        innovation = self.nodes.get((inode, onode, oldNum))
+        self.count(innovation)
+        return innovation
+
+
+    # Return the new link innovation between inode and onode, if it is known
+    def findLink(self, inode: int, onode: int, recurrent: bool) -> Innovation:
+        innovation = self.links.get((inode, onode, recurrent))
+        self.count(innovation)
+        return innovation
+
+
+    # Count a lookup as a hit or a miss
+    def count(self, innovation: Innovation) -> None:
+        if innovation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+
+    # Return the table holding the innovation and its key in it
+    def entry(self, innovation: Innovation) -> Tuple[Dict[tuple, Innovation], tuple]:
+        if innovation.type is InnovationType.NEWNODE:
+            return self.nodes, (innovation.inode, innovation.onode, innovation.oldNum)
+        else:
+            return self.links, (innovation.inode, innovation.onode, innovation.recurrent)
+
+
+    # Record an innovation of the current generation
+    def append(self, innovation: Innovation) -> None:
+        table, key = self.entry(innovation)
+        table[key] = innovation
+        self.generations[-1].append(innovation)
+
+
+    # Start a new generation, forgetting the innovations that fell out of the history
+    def nextGeneration(self) -> None:
+        history = self.history if self.history is not None else neat.innovationHistory
+        if history < 0:
+            return
+
+        self.generations.append([])
+        while len(self.generations) > history + 1:
+            for innovation in self.generations.popleft():
+                self.remove(innovation)
+
+
+    # Forget an innovation, unless a newer one took its place
+    def remove(self, innovation: Innovation) -> None:
+        table, key = self.entry(innovation)
+        if table.get(key) is innovation:
+            del table[key]
+
+
+    # Forget every innovation
+    def clear(self) -> None:
+        self.nodes.clear()
+        self.links.clear()
+        self.generations = deque([[]])
+
+
+    # Number of innovations that can still be matched
+    def __len__(self) -> int:
+        return len(self.nodes) + len(self.links)
+
+
+    # Iterate over the remembered innovations, oldest first
+    def __iter__(self) -> Iterator[Innovation]:
+        for generation in self.generations:
+            for innovation in generation:
+                table, key = self.entry(innovation)
+                if table.get(key) is innovation:
+                    yield innovation
@@ -1,23 +1,27 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Tuple
 
 from node import *
 from trait import *
+import neat
 
 class Link:
 
+    # Every gene holds a link, so they only get room for these attributes
+    __slots__ = ('weight', 'inode', 'onode', 'recurrent', 'timeDelay', 'trait', 'addedWeight', 'params')
+
     # Variable annotations
-    weight: float = 0
-    inode: Node = None
-    onode: Node = None
+    weight: float
+    inode: Node
+    onode: Node
 
-    recurrent: bool = False
-    timeDelay: bool = False
+    recurrent: bool
+    timeDelay: bool
 
-    trait: Trait = None
+    trait: Trait
 
-    addedWeight: float = False
+    addedWeight: float
 
     params: List[float]
 
@@ -29,6 +33,13 @@ class Link:
     recurrent: bool = None,
     link: Link = None) -> None:
 
+        self.weight = 0
+        self.inode = None
+        self.onode = None
+        self.recurrent = False
+        self.timeDelay = False
+        self.trait = None
+        self.addedWeight = False
         self.params = []
 
         # Including a trait pointer in the Link creation
@@ -65,8 +76,29 @@ class Link:
 
 
 
+    # Copy the trait parameters into the link
     def deriveTrait(self, trait: Trait) -> None:
         self.trait = trait
 
+        if trait is not None:
+            self.params = trait.params.copy()
+        else:
+            self.params = [0] * neat.numberOfTraitParameters
+
+    # Tell if the link reads the previous activation of its input, recurrent links all do when neat.timeDelayRecurrentLinks is set
+    def delayed(self) -> bool:
+        return self.timeDelay or (self.recurrent and neat.timeDelayRecurrentLinks)
+
+    # Tell if the weight of the link adapts in an adaptable net, only links of traits 2, 3 and 4 do
+    def adaptive(self) -> bool:
+        return self.trait is not None and self.trait.id in (2, 3, 4)
+
+    # Links are the same connection when they join the same node ids in the same direction
+    def key(self) -> Tuple[int, int, bool]:
+        return (self.inode.id, self.onode.id, self.recurrent)
+
     def __eq__(self, comp: Link) -> bool:
         return self.inode.id == comp.inode.id and self.onode.id == comp.onode.id and self.recurrent == comp.recurrent
+
+    def __hash__(self) -> int:
+        return hash(self.key())
@@ -1,11 +1,19 @@
 from random import uniform
 
 from math import log, sqrt
+import numpy as np
 from yaml import load, Loader
 
+from mutator import *
+
 verbosity: int = 0
 numberOfTraitParameters: int = 8
 timeAliveMinimum: int = 0
+phenotypeCacheSize: int = 256
+innovationHistory: int = -1
+weightMutationBatchMinimum: int = 50
+timeDelayRecurrentLinks: bool = False
+adaptableNetworks: bool = False
 
 def loadParameters(parameterFile: str) -> None:
     # Get global parameters
@@ -66,6 +74,11 @@ def loadParameters(parameterFile: str) -> None:
     global babiesStolen
     global numberOfRuns
     global verbosity
+    global phenotypeCacheSize
+    global innovationHistory
+    global weightMutationBatchMinimum
+    global timeDelayRecurrentLinks
+    global adaptableNetworks
 
     # Load parameters from file
 
@@ -130,6 +143,11 @@ def loadParameters(parameterFile: str) -> None:
         babiesStolen = parameter['babiesStolen']
         numberOfRuns = parameter['numberOfRuns']
         verbosity = parameter['verbosity']
+        phenotypeCacheSize = parameter.get('phenotypeCacheSize', phenotypeCacheSize)
+        innovationHistory = parameter.get('innovationHistory', innovationHistory)
+        weightMutationBatchMinimum = parameter.get('weightMutationBatchMinimum', weightMutationBatchMinimum)
+        timeDelayRecurrentLinks = parameter.get('timeDelayRecurrentLinks', timeDelayRecurrentLinks)
+        adaptableNetworks = parameter.get('adaptableNetworks', adaptableNetworks)
 
 
 iset = 0
@@ -152,9 +170,9 @@ def gaussrand():
 
 # I don't know what in earth this is doing
 def hebbian(weight, maxWeight, activeIn, activeOut, rates):
-    hebbRate = rate[0]
-    preRate = rate[1]
-    postRate = rate[2]
+    hebbRate = rates[0]
+    preRate = rates[1]
+    postRate = rates[2]
 
     maxWeight = max(5, maxWeight)
 
@@ -174,3 +192,76 @@ def hebbian(weight, maxWeight, activeIn, activeOut, rates):
         delta = (preRate * (maxWeight - weight) * activeIn * (1 - activeOut) -
         hebbRate * (topWeight + 2)  * activeIn * activeOut)
         return - weight - delta
+
+
+
+# Same as hebbian but over arrays of links at once, the rates are one row per rate
+def hebbianArray(weight, maxWeight, activeIn, activeOut, rates):
+    hebbRate = rates[0]
+    preRate = rates[1]
+    postRate = rates[2]
+
+    maxWeight = np.maximum(5, maxWeight)
+
+    weight = np.minimum(np.maximum(weight, -maxWeight), maxWeight)
+
+    negative = weight < 0
+    weight = np.abs(weight)
+
+    topWeight = np.minimum(weight + 2, maxWeight)
+
+    excite = weight + (hebbRate * (maxWeight - weight) * activeIn * activeOut +
+    preRate * topWeight  * activeIn * activeOut)
+
+    # In the inhibatory case, we strengthen the synapse when output is low and input is high
+    inhibit = - weight - (preRate * (maxWeight - weight) * activeIn * (1 - activeOut) -
+    hebbRate * (topWeight + 2)  * activeIn * activeOut)
+
+    return np.where(negative, inhibit, excite)
+
+
+
+# Mutate the weights of the genes of several genomes at once, the genes of each genome follow each other and counts gives how many each genome has
+# Every random number is drawn in one batch, then the severe, last genes and cold gaussian cases are applied with masks
+# Returns the new weights, frozen genes keep theirs
+def mutateWeightsArray(weight, frozen, counts, power, rate, mutationType):
+    counts = np.asarray(counts, dtype=np.intp)
+    total = len(weight)
+
+    randoms = np.random.random(len(counts) + 4 * total)
+    cold, gauss, reset, randnum = randoms[len(counts):].reshape(4, total)
+    randnum = randnum * (2 * power) - power
+
+    # Once in a while really shake things up
+    severe = randoms[:len(counts)] > 0.5
+
+    # Position of each gene among the genes of its genome that are not frozen
+    num = np.cumsum(~frozen) - 1
+
+    # A single genome keeps its flags as scalars
+    if len(counts) == 1:
+        severe = bool(severe[0])
+        last = num > total * 0.8 if total >= 10 else False
+
+    else:
+        starts = np.cumsum(counts) - counts
+        num -= np.repeat(np.concatenate(([0], num + 1))[starts], counts)
+        severe = np.repeat(severe, counts)
+
+        # The last genes of big genomes are mutated harder
+        size = np.repeat(counts, counts)
+        last = (size >= 10) & (num > size * 0.8)
+
+    # Half the time don't do any cold mutations
+    gausspoint = np.where(severe, 0.3, np.where(last, 0.5, 1 - rate))
+    coldgausspoint = np.where(severe | last, 0.2, (cold > 0.5) * 0.1)
+
+    if mutationType is Mutator.GAUSSIAN:
+        mutated = np.where(gauss > gausspoint, weight + randnum, np.where(reset > coldgausspoint, randnum, weight))
+    elif mutationType is Mutator.COLDGAUSSIAN:
+        mutated = randnum
+    else:
+        mutated = weight.copy()
+
+    np.clip(mutated, -8, 8, out=mutated)
+    return np.where(frozen, weight, mutated)
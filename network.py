@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Tuple
 
+from compilednetwork import *
 from genome import *
+from networkgraph import *
 from node import *
 from nodetype import *
 from print import *
@@ -26,8 +28,19 @@ class Network:
     maxWeight: float = 0
     adaptable: bool = False
 
+    # Neurons in topological order, only set if the net has no cycles
+    acyclic: bool = False
+    order: List[Node] = None
+
     outputList: List[float]
 
+    compiled: CompiledNetwork = None
+
+    # Depth of every neuron keyed by id, computed once per topology
+    depths: Dict[int, int] = None
+
+    # Strongly connected components of the nodes keyed by id, only built once isRecurrent is asked
+    graph: NetworkGraph = None
 
     def __init__(self,
     inputs: List[Node] = None,
@@ -75,11 +88,54 @@ class Network:
 
 
     # Puts the network back into an inactive state
+    # Every node is reset once, in a single pass over the node list
     def flush(self) -> None:
 
-        for output in self.outputs:
-            output.flushback()
+        for node in self.nodes:
+            node.activationCount = 0
+            node.output = 0
+            node.lastActivation = 0
+            node.lastActivation2 = 0
+
+            # Flush the links too (For future learning parameters possibility)
+            for link in node._incoming:
+                link.addedWeight = 0
+
+
+
+    # Puts the network back into the state genesis left it in, including the active flags
+    def reset(self) -> None:
+        self.flush()
+
+        for node in self.nodes:
+            node.activeFlag = False
+
+        if self.compiled is not None:
+            self.compiled.reset()
+
+
+
+    # Drops everything derived from the topology, call this after adding or removing nodes or links
+    def topologyChanged(self) -> None:
+        self.compiled = None
+        self.depths = None
+        self.graph = None
+
+        # Neurons of a phenotype always hold their incoming list, so the activation loops read the slot directly
+        for node in self.nodes:
+            if node._incoming is None:
+                node._incoming = []
 
+        self.order = self.topologicalOrder()
+        self.acyclic = self.order is not None
+
+
+
+    # Compile the net into flat arrays, built once and reused afterwards
+    def compile(self) -> CompiledNetwork:
+        if self.compiled is None:
+            self.compiled = CompiledNetwork(network=self)
+        return self.compiled
 
 
     # Verify flushedness for debugging
@@ -103,21 +159,21 @@ class Network:
                 # Ignore SENSORS
                 if node.type is not NodeType.SENSOR:
 
-                    node.inputs = []
+                    node._input = []
                     node.activeFlag = False
 
                     # For each incoming connection, add the activity from the connection to the activesum
-                    for link in node.incoming:
+                    for link in node._incoming:
                         # Handle possible time delays
                         if not link.timeDelay:
-                            node.inputs.append(link.weight * link.inode.getActiveOut())
+                            node._input.append(link.weight * link.inode.getActiveOut())
 
                             if (link.inode.activeFlag or link.inode.type is NodeType.SENSOR):
                                 node.activeFlag = True
 
                         # Input over a time delayed connection
                         else:
-                            node.inputs.append(link.weight * link.inode.getActiveOutPrevious())
+                            node._input.append(link.weight * link.inode.getActiveOutPrevious())
 
             # Now activate all the non-sensor nodes off their incoming activation
             for node in self.nodes:
@@ -135,36 +191,104 @@ class Network:
 
                     # Now run the net activation through an activation function
                     else:
-                        node.output = node.activation(node.aggregation(node.inputs))
+                        node.output = node.activation(node.aggregation(node._input))
 
                     # Increment the activationCount
 
                     node.activationCount += 1
 
         if self.adaptable:
-            # ADAPTATION:  Adapt weights based on activations
-            for node in self.nodes:
-                if node.type is not NodeType.SENSOR:
-                    # For each incoming connection, perform adaptation based on the trait of the connection
-                    for link in node.incoming:
-                        if link.trait.id == 2 or link.trait.id == 3 or link.trait.id == 4:
-                            # In the recurrent case we must take the last activation of the input for calculating hebbian changes
-                            if link.recurrent:
-                                link.weight = neat.hebbian(link.weight,
-                                self.maxWeight,
-                                link.inode.lastActivation,
-                                link.onode.getActiveOut(),
-                                link.params[0:3])
-                            else:
-                                link.weight = neat.hebbian(link.weight,
-                                self.maxWeight,
-                                link.inode.getActiveOut(),
-                                link.onode.getActiveOut(),
-                                link.params[0:3])
+            self.adapt()
+
         return True
 
 
 
+    # ADAPTATION:  Adapt weights based on activations
+    def adapt(self) -> None:
+        for node in self.nodes:
+            if node.type is not NodeType.SENSOR:
+                # For each incoming connection, perform adaptation based on the trait of the connection
+                for link in node._incoming:
+                    if link.adaptive():
+                        # In the recurrent case we must take the last activation of the input for calculating hebbian changes
+                        if link.recurrent:
+                            link.weight = neat.hebbian(link.weight,
+                            self.maxWeight,
+                            link.inode.lastActivation,
+                            link.onode.getActiveOut(),
+                            link.params[0:3])
+                        else:
+                            link.weight = neat.hebbian(link.weight,
+                            self.maxWeight,
+                            link.inode.getActiveOut(),
+                            link.onode.getActiveOut(),
+                            link.params[0:3])
+
+
+
+    # Activates the net on a batch of sensor inputs, one pattern per row, and returns the outputs per pattern
+    def activateBatch(self, inputs: List[List[float]], steps: int) -> np.ndarray:
+        return self.compile().activateBatch(inputs, steps)
+
+
+    # Steps the net once per row of sensor values, keeping its state between steps, and returns the outputs of every step
+    def run(self, sequence: List[List[float]]) -> np.ndarray:
+        return self.compile().run(sequence)[:, 0]
+
+
+    # Activates an acyclic net in one sweep along its topological order, giving the outputs it would relax to
+    def activateOrdered(self) -> bool:
+
+        for node in self.order:
+            node._input = []
+            node.activeFlag = False
+
+            # Every incoming node is already final
+            for link in node._incoming:
+                node._input.append(link.weight * link.inode.getActiveOut())
+
+                if (link.inode.activeFlag or link.inode.type is NodeType.SENSOR):
+                    node.activeFlag = True
+
+            if node.activeFlag:
+                node.lastActivation2 = node.lastActivation
+                node.lastActivation = node.output
+                node.output = node.activation(node.aggregation(node._input))
+                node.activationCount += 1
+
+        # The sweep counts as a single activation
+        if self.adaptable:
+            self.adapt()
+
+        return True
+
+
+    # Find a topological order of the neurons, returns None if the net has a cycle
+    def topologicalOrder(self) -> List[Node]:
+
+        # A time delay makes the net recurrent
+        if any(link.timeDelay for node in self.nodes if node.type is not NodeType.SENSOR for link in node.incoming):
+            return None
+
+        order = topologicalSort(*self.adjacency())
+        if order is None:
+            return None
+
+        return [self.nodes[i] for i in order]
+
+
+    # Tell which nodes are sensors and give the positions of the sources of every node's incoming links
+    def adjacency(self) -> Tuple[List[bool], List[List[int]]]:
+
+        index = {id(node): i for i, node in enumerate(self.nodes)}
+
+        sensor = [node.type is NodeType.SENSOR for node in self.nodes]
+        incoming = [[index[id(link.inode)] for link in node.incoming] for node in self.nodes]
+
+        return sensor, incoming
+
+
     # Add a new input node
     def addInput(self, node: Node) -> None:
         raise NotImplementedError
@@ -193,8 +317,15 @@ class Network:
 
 
     # This checks a POTENTIAL link if it must be recurrent
-    def isRecurrent(self, inode: Node, onode: Node, count: int, threshold: int) -> bool:
-        raise NotImplementedError
+    # The count and threshold of the original depth limited search are not needed by the component search
+    # Links into sensors are never used, so they are left out of the graph
+    def isRecurrent(self, inode: Node, onode: Node, count: int = None, threshold: int = None) -> bool:
+        if self.graph is None:
+            self.graph = NetworkGraph(
+                nodes=[id(node) for node in self.nodes],
+                links=[(id(link.inode), id(link.onode)) for node in self.nodes if node.type is not NodeType.SENSOR for link in node.incoming])
+
+        return self.graph.isRecurrent(id(inode), id(onode))
 
 
     # If all output are not active then return true
@@ -207,4 +338,12 @@ class Network:
 
     # Returns maximum depth:
     def maxDepth(self) -> int:
-        return max(output.depth(0, self) for output in self.outputs)
+        if self.depths is None:
+            self.depths = self.computeDepths()
+        return max(self.depths[id(output)] for output in self.outputs)
+
+
+    # Find the longest path from a sensor or a neuron without inputs to every node, keyed by id
+    # Links that close a cycle are not followed, so cycles only count once along a path
+    def computeDepths(self) -> Dict[int, int]:
+        return {id(node): depth for node, depth in zip(self.nodes, longestPaths(*self.adjacency()))}
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+class NetworkGraph:
+
+    # Variable annotations
+    successors: Dict[Hashable, List[Hashable]]
+    predecessors: Dict[Hashable, List[Hashable]]
+
+    # Strongly connected components, as the component of every node and the nodes of every component
+    component: Dict[Hashable, int]
+    members: Dict[int, List[Hashable]]
+
+    # Position of every component in a topological order of the components, links go from lower to higher positions
+    position: Dict[int, int]
+
+    # Components holding a cycle, either several nodes or a node linked to itself
+    cyclic: Set[int]
+
+    nextComponent: int = 0
+    nextPosition: int = 0
+
+
+    def __init__(self,
+    nodes: Iterable[Hashable] = None,
+    links: Iterable[Tuple[Hashable, Hashable]] = None) -> None:
+
+        self.successors = {}
+        self.predecessors = {}
+
+        if nodes is not None:
+            for node in nodes:
+                self.successors.setdefault(node, [])
+                self.predecessors.setdefault(node, [])
+
+        if links is not None:
+            for inode, onode in links:
+                self.successors.setdefault(inode, []).append(onode)
+                self.predecessors.setdefault(inode, [])
+                self.successors.setdefault(onode, [])
+                self.predecessors.setdefault(onode, []).append(inode)
+
+        self.analyze()
+
+
+    # Find the strongly connected components with Tarjan's algorithm, without recursion
+    def analyze(self) -> None:
+
+        index: Dict[Hashable, int] = {}
+        lowlink: Dict[Hashable, int] = {}
+        stack: List[Hashable] = []
+        onStack: Set[Hashable] = set()
+        components: List[List[Hashable]] = []
+
+        for root in self.successors:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            onStack.add(root)
+            work = [(root, iter(self.successors[root]))]
+
+            while work:
+                node, children = work[-1]
+
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        onStack.add(child)
+                        work.append((child, iter(self.successors[child])))
+                        break
+
+                    elif child in onStack:
+                        lowlink[node] = min(lowlink[node], index[child])
+
+                # Every child is done, the node closes a component if nothing above it on the stack reaches further back
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                    if lowlink[node] == index[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            onStack.discard(member)
+                            members.append(member)
+                            if member == node:
+                                break
+                        components.append(members)
+
+        self.component = {}
+        self.members = {}
+        self.position = {}
+        self.cyclic = set()
+
+        # Tarjan's algorithm finds the components in reverse topological order
+        for number, members in enumerate(reversed(components)):
+            self.members[number] = members
+            self.position[number] = number
+            for member in members:
+                self.component[member] = number
+
+            if len(members) > 1 or members[0] in self.successors[members[0]]:
+                self.cyclic.add(number)
+
+        self.nextComponent = len(components)
+        self.nextPosition = len(components)
+
+
+    # Add a node without any link, in a component of its own
+    def addNode(self, node: Hashable) -> None:
+        if node in self.component:
+            return
+
+        self.successors[node] = []
+        self.predecessors[node] = []
+
+        self.component[node] = self.nextComponent
+        self.members[self.nextComponent] = [node]
+        self.position[self.nextComponent] = self.nextPosition
+        self.nextComponent += 1
+        self.nextPosition += 1
+
+
+    # Add a link, merging the components it closes a cycle through, and tell if it is recurrent
+    # The topological order is repaired only over the positions between both ends, as in Pearce and Kelly's algorithm
+    def addLink(self, inode: Hashable, onode: Hashable) -> bool:
+        self.addNode(inode)
+        self.addNode(onode)
+        self.successors[inode].append(onode)
+        self.predecessors[onode].append(inode)
+
+        source = self.component[inode]
+        target = self.component[onode]
+
+        if source == target:
+            self.cyclic.add(source)
+            return True
+
+        lower = self.position[target]
+        upper = self.position[source]
+
+        # Already in order
+        if upper < lower:
+            return False
+
+        # The components the link leads to and the ones leading to it, within the positions to repair
+        forward = self.reach(target, self.successors, lower, upper)
+        backward = self.reach(source, self.predecessors, lower, upper)
+        merged = forward & backward
+
+        slots = sorted(self.position[component] for component in forward | backward)
+        before = sorted(backward - merged, key=self.position.get)
+        after = sorted(forward - merged, key=self.position.get)
+
+        # The components reached both ways now form a cycle with the new link
+        if merged:
+            for component in merged:
+                if component != source:
+                    for member in self.members[component]:
+                        self.component[member] = source
+                    self.members[source].extend(self.members.pop(component))
+                    del self.position[component]
+                    self.cyclic.discard(component)
+
+            self.cyclic.add(source)
+
+        # Whatever leads to the link comes first, then the cycle, then whatever the link leads to
+        for component, slot in zip(before, slots):
+            self.position[component] = slot
+        if merged:
+            self.position[source] = slots[len(before)]
+        for component, slot in zip(after, slots[len(slots) - len(after):]):
+            self.position[component] = slot
+
+        return bool(merged)
+
+
+    # Return the components reachable from start following links, among the ones positioned between lower and upper
+    def reach(self, start: int, links: Dict[Hashable, List[Hashable]], lower: int, upper: int) -> Set[int]:
+        reached = {start}
+        frontier = [start]
+
+        while frontier:
+            for member in self.members[frontier.pop()]:
+                for node in links[member]:
+                    component = self.component[node]
+                    if component not in reached and lower <= self.position[component] <= upper:
+                        reached.add(component)
+                        frontier.append(component)
+
+        return reached
+
+
+    # Tell if a potential link from inode to onode would be recurrent, that is if onode already reaches inode
+    def isRecurrent(self, inode: Hashable, onode: Hashable) -> bool:
+        if inode not in self.component or onode not in self.component:
+            return inode == onode
+
+        source = self.component[inode]
+        target = self.component[onode]
+
+        if source == target:
+            return True
+
+        # Links only go forward in the order, so onode can only reach inode from before it
+        if self.position[target] > self.position[source]:
+            return False
+
+        return source in self.reach(target, self.successors, self.position[target], self.position[source])
+
+
+
+# Find a topological order of the nodes from the sources of every node with Kahn's algorithm, returns None if there is a cycle
+# Links into sensors are never used, and the sensors are left out of the order
+# A single cycle anywhere makes the whole net relax, its acyclic parts are not swept on their own
+def topologicalSort(sensor: List[bool], incoming: List[List[int]]) -> List[int]:
+
+    # Number of links still to be placed before each node
+    pending = [0 if sensor[i] else len(sources) for i, sources in enumerate(incoming)]
+    outgoing = [[] for _ in incoming]
+    for i, sources in enumerate(incoming):
+        if not sensor[i]:
+            for j in sources:
+                outgoing[j].append(i)
+
+    ready = [i for i, count in enumerate(pending) if count == 0]
+    order = []
+
+    while ready:
+        j = ready.pop()
+        order.append(j)
+
+        for i in outgoing[j]:
+            pending[i] -= 1
+            if pending[i] == 0:
+                ready.append(i)
+
+    # Nodes on a cycle never run out of pending links
+    if len(order) < len(incoming):
+        return None
+
+    return [i for i in order if not sensor[i]]
+
+
+# Find the longest path from a sensor or a node without inputs to every node, from the sources of every node
+# Each link is visited once, links that close a cycle are not followed so cycles only count once along a path
+def longestPaths(sensor: List[bool], incoming: List[List[int]]) -> List[int]:
+
+    depths = [-1] * len(incoming)
+    onStack = [False] * len(incoming)
+
+    for root in range(len(incoming)):
+        if depths[root] >= 0:
+            continue
+
+        depths[root] = 0
+        onStack[root] = True
+        stack = [(root, iter(incoming[root] if not sensor[root] else []))]
+
+        while stack:
+            node, sources = stack[-1]
+
+            for source in sources:
+
+                # This link closes a cycle
+                if onStack[source]:
+                    continue
+
+                # Already finished, only extend the path through it
+                if depths[source] >= 0:
+                    depths[node] = max(depths[node], depths[source] + 1)
+                    continue
+
+                depths[source] = 0
+                onStack[source] = True
+                stack.append((source, iter(incoming[source] if not sensor[source] else [])))
+                break
+
+            # Every incoming link is done, hand the depth to the node that asked for it
+            else:
+                stack.pop()
+                onStack[node] = False
+                if stack:
+                    parent = stack[-1][0]
+                    depths[parent] = max(depths[parent], depths[node] + 1)
+
+    return depths
@@ -15,39 +15,45 @@ import neat
 
 class Node:
 
+    # Genomes hold many nodes, so they only get room for these attributes
+    __slots__ = ('activationCount', 'lastActivation', 'lastActivation2', 'trait', 'duplicate', 'analogue', 'override', 'frozen',
+    'type', 'place', 'activation', 'aggregation', '_input', 'output', '_incoming', '_outcoming', '_rowLevels', 'row', 'xpos', 'ypos',
+    'id', 'activeFlag')
+
     # Variable annotations
-    activationCount: int = 0
-    lastActivation: float = 0
-    lastActivation2: float = 0
+    activationCount: int
+    lastActivation: float
+    lastActivation2: float
 
-    trait: Trait = None
+    trait: Trait
 
-    duplicate: Node = None
-    analogue: Node = None
+    duplicate: Node
+    analogue: Node
 
-    override: float = 0
+    override: float
 
-    frozen: bool = False
+    frozen: bool
 
-    type: NodeType = None
-    place: NodePlace = None
-    activation: Callable = Activation.sigmoid
-    aggregation: Callable = Aggregation.sum
+    type: NodeType
+    place: NodePlace
+    activation: Activation
+    aggregation: Aggregation
 
-    input: List[float]
-    output: float = 0
+    output: float
 
-    incoming: List[Link]
-    outcoming: List[Link]
+    # Only phenotype nodes use these lists, they are created on first access
+    _input: List[float]
+    _incoming: List[Link]
+    _outcoming: List[Link]
+    _rowLevels: List[float]
 
-    rowLevels: List[float]
     row: int
     xpos: int
     ypos: int
 
-    id: int = 0
+    id: int
 
-    activeFlag: bool = False
+    activeFlag: bool
 
 
     def __init__(self,
@@ -59,12 +65,29 @@ class Node:
     traits: List[Trait] = None,
     data: Dict = None) -> None:
 
-        self.input = []
+        self.activationCount = 0
+        self.lastActivation = 0
+        self.lastActivation2 = 0
+
+        self.trait = None
+        self.duplicate = None
+        self.analogue = None
+        self.override = 0
+        self.frozen = False
+
+        self.type = None
+        self.place = None
+        self.activation = Activation.sigmoid
+        self.aggregation = Aggregation.sum
 
-        self.incoming = []
-        self.outcoming = []
+        self.output = 0
+        self.id = 0
+        self.activeFlag = False
 
-        self.rowLevels = []
+        self._input = None
+        self._incoming = None
+        self._outcoming = None
+        self._rowLevels = None
 
         # Construct a node from type, id and place
         if (type is not None and
@@ -82,14 +105,15 @@ class Node:
             self.type = type
             self.id = id
 
-        # Construct a node off another node for genome purposes
-        elif (node is not None and
-        trait is not None):
+        # Construct a node off another node for genome purposes, the trait may be None
+        elif (node is not None):
 
             self.type = node.type
             self.id = node.id
             self.place = node.place
             self.trait = trait
+            self.activation = node.activation
+            self.aggregation = node.aggregation
 
         # Generate the object from dict
         elif (data is not None and
@@ -102,6 +126,10 @@ class Node:
             self.type = NodeType(data['type'])
             self.place = NodePlace(data['place'])
 
+            # Nodes without functions given are sigmoid neurons summing their inputs
+            self.activation = Activation.registry[data.get('activation', 'sigmoid')]
+            self.aggregation = Aggregation.registry[data.get('aggregation', 'sum')]
+
             if data['trait'] == 0:
                 self.trait = None
             else:
@@ -111,14 +139,60 @@ class Node:
                         break
 
 
+    @property
+    def input(self) -> List[float]:
+        if self._input is None:
+            self._input = []
+        return self._input
+
+    @input.setter
+    def input(self, input: List[float]) -> None:
+        self._input = input
+
+
+    @property
+    def incoming(self) -> List[Link]:
+        if self._incoming is None:
+            self._incoming = []
+        return self._incoming
+
+    @incoming.setter
+    def incoming(self, incoming: List[Link]) -> None:
+        self._incoming = incoming
+
+
+    @property
+    def outcoming(self) -> List[Link]:
+        if self._outcoming is None:
+            self._outcoming = []
+        return self._outcoming
+
+    @outcoming.setter
+    def outcoming(self, outcoming: List[Link]) -> None:
+        self._outcoming = outcoming
+
+
+    @property
+    def rowLevels(self) -> List[float]:
+        if self._rowLevels is None:
+            self._rowLevels = []
+        return self._rowLevels
+
+    @rowLevels.setter
+    def rowLevels(self, rowLevels: List[float]) -> None:
+        self._rowLevels = rowLevels
+
+
     # Return the dict representation of the object
     def toDict(self) -> Dict[str, object]:
         data = {}
 
         data['id'] = self.id
-        data['trait'] = self.trait.id
+        data['trait'] = 0 if self.trait is None else self.trait.id
         data['type'] = self.type
         data['place'] = self.place
+        data['activation'] = self.activation.name
+        data['aggregation'] = self.aggregation.name
 
         return data
 
@@ -130,7 +204,9 @@ class Node:
 
     # Return activation from PREVIOUS time step
     def getActiveOutPrevious(self) -> float:
-        raise NotImplementedError
+        if self.activationCount > 1:
+            return self.lastActivation
+        return 0
 
 
     # If the node is a SENSOR, returns true and loads the value
@@ -193,16 +269,6 @@ class Node:
 
     # Find the greatest depth starting from this neuron at depth
     def depth(self, depth: int, network: Network) -> int:
-        # Noice
-        if depth > 30:
-            return 10
-
-        # Base case
-        if self.type == NodeType.SENSOR:
-            return depth
-
-        elif len(self.incoming) == 0:
-            return depth
-
-        else:
-            return max(link.inode.depth(depth + 1, network) for link in self.incoming)
+        if network.depths is None:
+            network.depths = network.computeDepths()
+        return depth + network.depths[id(self)]
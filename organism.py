@@ -1,22 +1,34 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List
 
+from compilednetwork import *
 from genome import *
 from network import *
+from phenotypecache import *
 from specie import *
 
 class Organism:
 
+    # Populations hold many organisms, so they only get room for these attributes
+    __slots__ = ('fitness', 'originalFitness', 'highestFitness', 'error', 'genome', 'phenotype', 'compiledPhenotype', 'specie', 'parent',
+    'expectedOffspring', 'superChampionOffspring', 'generation', 'winner', 'eliminate', 'champion', 'populationChampion',
+    'populationChampionChild', 'timeAlive', 'mateBaby', 'mutationStructureBaby', 'metadata', 'outputList')
+
     # Variable annotations
     fitness: float
     originalFitness: float
+    highestFitness: float
     error: float
 
     genome: Genome
-    nework: Network
+    phenotype: Network
+    compiledPhenotype: CompiledNetwork
     specie: Specie
 
+    # The organism this one was cloned or mutated from, until its network is compiled
+    parent: Organism
+
     expectedOffspring: float
     superChampionOffspring: int
 
@@ -35,12 +47,14 @@ class Organism:
     mutationStructureBaby: bool
 
     metadata: str
+    outputList: List[float]
 
     def __init__(self,
     fitness: int = None,
     genome: Genome = None,
     metadata: str = '',
     generation: int = None,
+    parent: Organism = None,
     data: Dict[str, object] = None) -> None:
 
         # Initialize organism from fit, genome and generation number
@@ -68,7 +82,10 @@ class Organism:
             self.generation = generation
             self.metadata = metadata
 
-            self.network = genome.genesis(genome.id)
+            # The network is only built when first needed
+            self.phenotype = None
+            self.compiledPhenotype = None
+            self.parent = parent
 
 
 
@@ -77,11 +94,51 @@ class Organism:
             raise NotImplementedError
 
 
+    # Build the network on first access
+    @property
+    def network(self) -> Network:
+        if self.phenotype is None:
+            self.phenotype = self.genome.genesis(self.genome.id)
+        return self.phenotype
+
+    @network.setter
+    def network(self, network: Network) -> None:
+        self.phenotype = network
+
+
+    # Compile the network on first access, without building its nodes and links
+    # A child with the same topology as its parent only patches the weights into a copy of the parent's compiled net
+    @property
+    def compiled(self) -> CompiledNetwork:
+        if self.compiledPhenotype is None:
+            if self.phenotype is not None:
+                self.compiledPhenotype = self.phenotype.compile()
+            elif self.parent is not None and self.parent.compiledPhenotype is not None and self.parent.compiledPhenotype.topology == self.genome.topologyKey():
+                self.compiledPhenotype = self.parent.compiledPhenotype.copy().patch(self.genome)
+            else:
+                self.compiledPhenotype = phenotypeCache.compile(self.genome)
+
+            # The parent is not needed anymore
+            self.parent = None
+
+        return self.compiledPhenotype
+
+
     # Return the dict representation of the object
     def toDict(self) -> Dict[str, object]:
         raise NotImplementedError
 
 
     # Regenerate the network based on a change in the genotype
-    def updatePhenotype(self):
-        raise NotImplementedError
+    def updatePhenotype(self) -> None:
+
+        compiled = self.compiledPhenotype
+
+        # Everything built from the old genotype is out of date
+        self.phenotype = None
+        self.compiledPhenotype = None
+        self.genome.phenotypeChanged()
+
+        # Weight and trait changes are patched into a copy, the compiled net may be shared with other organisms
+        if compiled is not None and compiled.topology == self.genome.topologyKey():
+            self.compiledPhenotype = compiled.copy().patch(self.genome)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from compilednetwork import *
+import neat
+
+class PhenotypeCache:
+
+    # Variable annotations
+    size: int = None
+    networks: OrderedDict
+
+    hits: int = 0
+    misses: int = 0
+
+    # Keep at most size compiled nets, or neat.phenotypeCacheSize of them if not given
+    def __init__(self,
+    size: int = None) -> None:
+
+        self.size = size
+        self.networks = OrderedDict()
+
+
+    # Return the compiled net of the genome, patching a copy of a cached net of the same topology when there is one
+    # The cached nets only lend their layout, every caller gets its own weights and state
+    # Genome.topologyKey names the nodes of the genes by position, so equal keys always mean the same layout
+    def compile(self, genome: Genome) -> CompiledNetwork:
+
+        size = self.size if self.size is not None else neat.phenotypeCacheSize
+        if size <= 0:
+            return CompiledNetwork(genome=genome)
+
+        key = genome.topologyKey()
+        compiled = self.networks.get(key)
+
+        # Build it, and keep an untouched copy of it
+        if compiled is None:
+            self.misses += 1
+            compiled = CompiledNetwork(genome=genome)
+
+            # Keyed by the topology the layout was really compiled from
+            self.networks[compiled.topology] = compiled.copy()
+            while len(self.networks) > size:
+                self.networks.popitem(last=False)
+
+            return compiled
+
+        self.hits += 1
+        self.networks.move_to_end(key)
+
+        return compiled.copy().patch(genome)
+
+
+    # Forget every cached net
+    def clear(self) -> None:
+        self.networks.clear()
+
+
+
+# Shared by every organism
+phenotypeCache: PhenotypeCache = PhenotypeCache()
@@ -8,9 +8,11 @@ from yaml import dump
 
 import neat
 import organism
+import genome as gn
 import specie as sp
 from genome import *
 from innovation import *
+from innovationregistry import *
 from mutator import *
 from print import *
 
@@ -19,7 +21,7 @@ class Population:
     # Variable annotations
     organisms: List[Organism]
     species: List[Specie]
-    innovations: List[Innovation]
+    innovations: InnovationRegistry
 
     currentNodeId: int
     currentSpecieId: int
@@ -43,7 +45,7 @@ class Population:
 
         self.organisms = []
         self.species = []
-        self.innovations = []
+        self.innovations = InnovationRegistry()
 
         # Construct off of a single spawning Genome without mutation
         if (genome is not None and
@@ -80,12 +82,16 @@ class Population:
         # Create copies of the genome
         for count in range(1, size+1):
             newGenome = genome.duplicate(count)
-            newGenome.mutateLinkWeights(1.0, 1.0, Mutator.COLDGAUSSIAN)
-            newGenome.randomizeTraits()
 
             newOrganism = organism.Organism(fitness=0.0, genome=newGenome, generation=1);
             self.organisms.append(newOrganism)
 
+        # Every copy starts from its own random weights
+        self.mutateLinkWeights(1.0, 1.0, Mutator.COLDGAUSSIAN)
+
+        for newOrganism in self.organisms:
+            newOrganism.genome.randomizeTraits()
+
         # Store the current node id and innovation number
         self.currentNodeId = newGenome.getLastNodeId()
         self.currentInnovationNumber = newGenome.getLastInnovationNumber()
@@ -98,18 +104,22 @@ class Population:
     def speciate(self) -> None:
 
         # Variable annotations
-        compareOrganism: organism.Organism
         newSpecie: sp.Specie
 
+        genomes = [organism.genome for organism in self.organisms]
+
+        # Distances to the representative of every specie, one column per specie
+        # A specie created along the way only needs its distances to the organisms left to place
+        columns = self.compatibilityMatrix().T.tolist()
+
         # Loop for each organism
-        for organism in self.organisms:
+        for number, organism in enumerate(self.organisms):
 
             # Search for each specie
-            for specie in self.species:
-                compareOrganism = specie.organisms[0]
+            for specie, column in zip(self.species, columns):
 
                 # Found compatible specie, add organism to specie
-                if organism.genome.compatibility(compareOrganism.genome) < neat.compatibilityThreshold:
+                if column[number] < neat.compatibilityThreshold:
                     specie.organisms.append(organism)
                     organism.specie = specie
                     break
@@ -122,9 +132,32 @@ class Population:
                 newSpecie.organisms.append(organism)
                 organism.specie = newSpecie
 
+                columns.append([np.inf] * (number + 1) + gn.compatibilityMatrix(genomes[number + 1:], [organism.genome])[:, 0].tolist())
+
         self.currentSpecieId = len(self.species)
 
 
+    # Compatibility of every organism's genome with the representative of every specie
+    def compatibilityMatrix(self, chunkSize: int = 1024) -> np.ndarray:
+        return gn.compatibilityMatrix(
+            [organism.genome for organism in self.organisms],
+            [specie.organisms[0].genome for specie in self.species],
+            chunkSize)
+
+
+    # Mutate the link weights of every organism's genome in a single call
+    def mutateLinkWeights(self, power: float, rate: float, mutationType: Mutator) -> None:
+        gn.mutateLinkWeights([organism.genome for organism in self.organisms], power, rate, mutationType)
+
+
+    # Activates every organism's network on the same batch of inputs at once
+    # Returns the outputs indexed by organism, pattern and output
+    def activateBatch(self, inputs: List[List[float]], steps: List[int]) -> np.ndarray:
+        compiled = CompiledNetwork(networks=[organism.compiled for organism in self.organisms])
+        outputs = compiled.activateBatch(inputs, steps)
+        return outputs.reshape(len(inputs), len(self.organisms), -1).transpose(1, 0, 2)
+
+
     # Certified UwU moment
     def printToFile(self, experimentNumber: int, generationNumber: int) -> None:
         raise DeprecationWarning
@@ -239,8 +272,8 @@ class Population:
             self.highestFitness = sortedSpecies[0].organisms[0].originalFitness
             self.highestLastChanged = 0
             vprint(1, f'New Population Record Fitness: {self.highestFitness}')
-            vprint(1, f'Output list: {sortedSpecies[0].organisms[0].network.outputList}')
-            vprint(1, f'Node count: {len(sortedSpecies[0].organisms[0].network.nodes)}')
+            vprint(1, f'Output list: {sortedSpecies[0].organisms[0].outputList}')
+            vprint(1, f'Node count: {len(sortedSpecies[0].organisms[0].genome.nodes)}')
             sortedSpecies[0].organisms[0].genome.print()
             vprint(1, f'')
         else:
@@ -405,6 +438,9 @@ class Population:
                     self.organisms.append(organism)
 
 
+        # Forget the innovations that are too old to be matched again
+        self.innovations.nextGeneration()
+
         # Epoch completed
         vprint(2, f'Epoch completed\n\n\n\n')
 
@@ -181,7 +181,6 @@ class Specie:
         randomSpecie: Specie # For mating outside the specie
         randomMultiplier: float
 
-        networkAnalogue: Network # For adding link to test for recurrency
 
         pause: int
         outside: bool
@@ -228,12 +227,10 @@ class Specie:
                             newGenome.mutateLinkWeights(neat.weightMutationPower, 1, Mutator.GAUSSIAN)
                         else:
                             # Sometimes we add a link to a superchamp
-                            networkAnalogue = newGenome.genesis(generation)
                             newGenome.mutateAddLink(population, neat.newLinkTries)
-                            networkAnalogue = None
                             mutationStructureBaby = True
 
-                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation)
+                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation, parent=mom)
 
                     if champion.superChampionOffspring == 1:
                         if champion.populationChampion:
@@ -249,7 +246,7 @@ class Specie:
                     newGenome = mom.genome.duplicate(newId)
 
                     # Baby is just like mommy
-                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation)
+                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation, parent=mom)
 
                     championDone = True
 
@@ -267,9 +264,7 @@ class Specie:
                         mutationStructureBaby = True
 
                     elif random() < neat.mutateAddLinkProbability:
-                        networkAnalogue = newGenome.genesis(generation)
                         newGenome.mutateAddLink(population, neat.newLinkTries)
-                        networkAnalogue = None
                         mutationStructureBaby = True
 
                     else:
@@ -292,7 +287,7 @@ class Specie:
                         if random() < neat.mutateGeneReenableProbability:
                             newGenome.mutateGeneReenable()
 
-                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation)
+                    baby = org.Organism(fitness=0, genome=newGenome, generation=generation, parent=mom)
 
                 # Otherwise we should mate
                 else:
@@ -345,9 +340,7 @@ class Specie:
                             mutationStructureBaby = True
 
                         elif random() < neat.mutateAddLinkProbability:
-                            networkAnalogue = newGenome.genesis(generation)
                             newGenome.mutateAddLink(population, neat.newLinkTries)
-                            networkAnalogue = None
                             mutationStructureBaby = True
 
                         else:
@@ -400,7 +393,7 @@ class Specie:
                         compareOrganism = specie.organisms[0]
 
                         # Found compatible specie, add organism to specie
-                        if baby.genome.compatibility(compareOrganism.genome) < neat.compatibilityThreshold:
+                        if baby.genome.compatible(compareOrganism.genome, neat.compatibilityThreshold):
                             specie.organisms.append(baby)
                             baby.specie = specie
                             break
@@ -7,6 +7,9 @@ import neat
 
 class Trait:
 
+    # Only the id and parameters are kept
+    __slots__ = ('id', 'params')
+
     # Variable annotations
     id: int
     params: List[float]
@@ -16,6 +19,7 @@ class Trait:
     params: List[float] = None,
     trait1: Trait = None,
     trait2: Trait = None,
+    trait: Trait = None,
     data: Dict[str, object] = None) -> None:
 
         # Construct a trait from parameters
@@ -31,6 +35,11 @@ class Trait:
             self.id = trait1.id
             self.params = [(a + b) / 2 for a, b in zip(trait1.params, trait2.params)]
 
+        # Copy Constructor
+        elif (trait is not None):
+            self.id = trait.id
+            self.params = trait.params.copy()
+
         # Generate the object from dict
         elif (data is not None):
             self.id = data['id']